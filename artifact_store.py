@@ -0,0 +1,247 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from incremental import fingerprint
+from records import Record
+
+FEATURE = "feature"
+USER_STORY = "user_story"
+TEST_CASE = "test_case"
+
+
+def validation_status(result: Any) -> str:
+    return "pass" if str(result).strip().lower().startswith("pass") else "fail"
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """SQLite index of everything a run generates, kept across runs.
+
+    ``items`` ties features, user stories and test cases of each run together
+    (F-xxx -> US-xxx -> TC-xxx -> script, validation result) with a content hash per
+    item; ``files`` lists the scripts and documents written to disk, so listings never
+    scan or read the output folders. Writes come in one transaction per node.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                started_at REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS items (
+                run_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                parent_id TEXT,
+                feature_id TEXT,
+                content_hash TEXT NOT NULL,
+                data TEXT NOT NULL,
+                script_path TEXT,
+                validation TEXT,
+                status TEXT,
+                PRIMARY KEY (run_id, kind, item_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_items_item_id ON items(kind, item_id);
+            CREATE INDEX IF NOT EXISTS idx_items_feature ON items(feature_id, run_id);
+            CREATE INDEX IF NOT EXISTS idx_items_hash ON items(content_hash);
+            CREATE INDEX IF NOT EXISTS idx_items_status ON items(run_id, kind, status);
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                category TEXT NOT NULL,
+                folder TEXT NOT NULL,
+                name TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                modified REAL NOT NULL,
+                content_hash TEXT NOT NULL,
+                run_id TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_files_folder ON files(folder, name);
+            CREATE INDEX IF NOT EXISTS idx_files_run ON files(run_id);
+            CREATE INDEX IF NOT EXISTS idx_files_hash ON files(content_hash);
+            """
+        )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    # -------------------------------
+    # Writes
+    # -------------------------------
+    def start_run(self, run_id: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO runs (run_id, started_at) VALUES (?, ?)", (run_id, time.time()))
+
+    def finish_run(self, run_id: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (time.time(), run_id))
+
+    def put_items(self, run_id: str, kind: str, items: Iterable[Record],
+                  feature_ids: Optional[Dict[str, str]] = None) -> None:
+        # feature_ids maps a test case's user story to its feature; stories and features carry their own.
+        rows = []
+        for item in items:
+            if kind == FEATURE:
+                feature_id = item.id
+            elif kind == USER_STORY:
+                feature_id = item.parent_id
+            else:
+                feature_id = (feature_ids or {}).get(item.parent_id) or str(item.id or "").split("_")[0]
+            rows.append((run_id, kind, item.id or fingerprint(item), item.parent_id, feature_id, fingerprint(item),
+                         item.to_prompt()))
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO items (run_id, kind, item_id, parent_id, feature_id, content_hash, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def set_scripts(self, run_id: str, scripts: Dict[str, str]) -> None:
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE items SET script_path = ? WHERE run_id = ? AND kind = ? AND item_id = ?",
+                [(os.path.abspath(path), run_id, TEST_CASE, tc_id) for tc_id, path in scripts.items()],
+            )
+
+    def set_validation(self, run_id: str, results: Dict[str, str]) -> None:
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE items SET validation = ?, status = ? WHERE run_id = ? AND kind = ? AND item_id = ?",
+                [(result, validation_status(result), run_id, TEST_CASE, tc_id) for tc_id, result in results.items()],
+            )
+
+    def put_files(self, category: str, paths: Iterable[str], run_id: str = None) -> None:
+        rows = []
+        for path in dict.fromkeys(os.path.abspath(path) for path in paths):
+            if not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            rows.append((path, category, os.path.dirname(path), os.path.basename(path), stat.st_size, stat.st_mtime,
+                         file_hash(path), run_id))
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO files (path, category, folder, name, size, modified, content_hash, run_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def sync_folder(self, category: str, folder: str) -> None:
+        # Explicit refresh: picks up files added or removed outside the pipeline.
+        folder = os.path.abspath(folder)
+        on_disk = [entry.path for entry in os.scandir(folder) if entry.is_file()] if os.path.isdir(folder) else []
+        self.forget_folder(folder, keep=on_disk)
+        known = {row["path"]: row for row in self._query("SELECT path, size, modified FROM files WHERE folder = ?", (folder,))}
+        changed = []
+        for path in on_disk:
+            stat = os.stat(path)
+            row = known.get(os.path.abspath(path))
+            if row is None or row["size"] != stat.st_size or row["modified"] != stat.st_mtime:
+                changed.append(path)
+        self.put_files(category, changed)
+
+    def forget_folder(self, folder: str, keep: Iterable[str] = ()) -> None:
+        folder = os.path.abspath(folder)
+        keep = {os.path.abspath(path) for path in keep}
+        with self._transaction() as conn:
+            paths = [row[0] for row in conn.execute("SELECT path FROM files WHERE folder = ?", (folder,)).fetchall()]
+            conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in paths if path not in keep])
+
+    # -------------------------------
+    # Queries
+    # -------------------------------
+    def list_files(self, folder: str, offset: int = 0, limit: int = 25) -> Tuple[List[Dict[str, Any]], int]:
+        folder = os.path.abspath(folder)
+        rows = self._query(
+            "SELECT path, name, size, modified, content_hash, run_id FROM files WHERE folder = ? ORDER BY name "
+            "LIMIT ? OFFSET ?",
+            (folder, limit, offset),
+        )
+        total = self._query("SELECT COUNT(*) AS total FROM files WHERE folder = ?", (folder,))[0]["total"]
+        return rows, total
+
+    def runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        return self._query("SELECT run_id, started_at, finished_at FROM runs ORDER BY started_at DESC LIMIT ?", (limit,))
+
+    def latest_run(self, finished: bool = True) -> Optional[str]:
+        rows = self._query("SELECT run_id FROM runs" + (" WHERE finished_at IS NOT NULL" if finished else "")
+                           + " ORDER BY started_at DESC LIMIT 1")
+        return rows[0]["run_id"] if rows else None
+
+    def by_run(self, run_id: str, kind: str = None) -> List[Dict[str, Any]]:
+        if kind is None:
+            return self._query("SELECT * FROM items WHERE run_id = ? ORDER BY kind, item_id", (run_id,))
+        return self._query("SELECT * FROM items WHERE run_id = ? AND kind = ? ORDER BY item_id", (run_id, kind))
+
+    def by_feature(self, feature_id: str, run_id: str = None) -> List[Dict[str, Any]]:
+        # The feature, its stories and test cases (with script and validation) in one run, the latest by default.
+        run_id = run_id or self.latest_run(finished=False)
+        return self._query("SELECT * FROM items WHERE feature_id = ? AND run_id = ? ORDER BY item_id",
+                           (feature_id, run_id))
+
+    def by_status(self, status: str, run_id: str = None) -> List[Dict[str, Any]]:
+        run_id = run_id or self.latest_run(finished=False)
+        return self._query("SELECT * FROM items WHERE run_id = ? AND kind = ? AND status = ? ORDER BY item_id",
+                           (run_id, TEST_CASE, status))
+
+    def history(self, kind: str, item_id: str) -> List[Dict[str, Any]]:
+        # One item across runs, newest first.
+        return self._query(
+            "SELECT items.* FROM items JOIN runs ON runs.run_id = items.run_id WHERE kind = ? AND item_id = ? "
+            "ORDER BY runs.started_at DESC",
+            (kind, item_id),
+        )
+
+    def diff_runs(self, old_run_id: str, new_run_id: str, kind: str = TEST_CASE) -> Dict[str, List[str]]:
+        # Items added, removed or changed (different content hash or validation status) between two runs.
+        old = {row["item_id"]: row for row in self._query(
+            "SELECT item_id, content_hash, status FROM items WHERE run_id = ? AND kind = ?", (old_run_id, kind))}
+        new = {row["item_id"]: row for row in self._query(
+            "SELECT item_id, content_hash, status FROM items WHERE run_id = ? AND kind = ?", (new_run_id, kind))}
+        return {
+            "added": sorted(new.keys() - old.keys()),
+            "removed": sorted(old.keys() - new.keys()),
+            "changed": sorted(item_id for item_id in new.keys() & old.keys()
+                              if (new[item_id]["content_hash"], new[item_id]["status"])
+                              != (old[item_id]["content_hash"], old[item_id]["status"])),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        rows = self._query("SELECT kind, COUNT(*) AS count FROM items GROUP BY kind")
+        runs = self._query("SELECT COUNT(*) AS count FROM runs")[0]["count"]
+        files = self._query("SELECT COUNT(*) AS count FROM files")[0]["count"]
+        return {"runs": runs, "items": {row["kind"]: row["count"] for row in rows}, "files": files}
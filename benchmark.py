@@ -0,0 +1,337 @@
+"""Offline throughput benchmark for the LangGraph pipeline.
+
+Runs the graph from ``createLangraphApp`` end to end against a deterministic fake
+LLM (configurable latency, token rate and failure profile) on synthetic
+requirement documents, so performance changes can be measured without Azure quota.
+
+    python benchmark.py --sizes 1 10 100 --latency 0.5 --tokens-per-second 400
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from chunking import estimate_tokens
+
+STORIES_PER_FEATURE = 2
+TEST_CASES_PER_STORY = 2
+
+AREAS = ["Login", "Registration", "Search", "Cart", "Checkout", "Payments", "Profile", "Orders",
+         "Notifications", "Reports", "Admin", "Inventory", "Wishlist", "Reviews", "Support", "Settings"]
+
+FAKE_SCRIPT = """import pytest
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+
+def test_{name}():
+    driver = webdriver.Chrome()
+    try:
+        driver.get("https://example.test/{name}")
+        element = WebDriverWait(driver, 10).until(EC.visibility_of_element_located((By.ID, "main")))
+        assert element.is_displayed()
+    finally:
+        driver.quit()
+"""
+
+FAKE_PAGE_TEST = """from pages import {page}
+
+
+def test_{name}(driver):
+    page = {page}(driver).open()
+    page.submit_form()
+    assert page.is_visible(page.CONFIRMATION)
+"""
+
+FAKE_PAGE_CLASS = """
+
+class {page}(BasePage):
+    path = "/{feature}"
+    CONFIRMATION = (By.ID, "confirmation")
+
+    def submit_form(self):
+        \"\"\"Submit the main form.\"\"\"
+        self.click((By.ID, "submit"))
+"""
+
+
+# -------------------------------
+# Synthetic requirement documents
+# -------------------------------
+def synthetic_requirements(feature_count: int) -> List[str]:
+    sections = []
+    for number in range(1, feature_count + 1):
+        area = AREAS[(number - 1) % len(AREAS)]
+        sections.append(
+            f"Feature {number}: {area} capability {number}\n\n"
+            f"The system shall allow users to use the {area.lower()} capability {number}. "
+            f"Users must be able to open the {area.lower()} page, fill in the required fields and submit the form. "
+            f"Validation errors are shown inline and successful submissions show a confirmation message."
+        )
+    return ["\n\n".join(sections)]
+
+
+# -------------------------------
+# Fake LLM backend
+# -------------------------------
+class FakeResponse:
+    def __init__(self, content: str, prompt_tokens: int, max_tokens: int = None, cached_tokens: int = 0):
+        finish_reason = "stop"
+        if max_tokens and estimate_tokens(content) > max_tokens:
+            # Cut off like a real deployment that ran out of its output budget.
+            content, finish_reason = content[:max_tokens * 4], "length"
+        self.content = content
+        completion_tokens = estimate_tokens(content)
+        self.usage_metadata = {"input_tokens": prompt_tokens, "output_tokens": completion_tokens,
+                               "total_tokens": prompt_tokens + completion_tokens,
+                               "input_token_details": {"cache_read": cached_tokens}}
+        self.response_metadata = {"finish_reason": finish_reason}
+
+
+class FakeChunk:
+    def __init__(self, content: str, usage_metadata: Dict[str, int] = None, response_metadata: Dict[str, Any] = None):
+        self.content = content
+        self.usage_metadata = usage_metadata
+        self.response_metadata = response_metadata or {}
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, message: str, retry_after: float = 0.05):
+        super().__init__(message)
+        self.response = SimpleNamespace(status_code=429, headers={"retry-after-ms": str(int(retry_after * 1000))})
+
+
+class FakeLLM:
+    """Stands in for the module-level AzureChatOpenAI client in main.py.
+
+    Answers are derived from the ids in the prompt, so runs are deterministic. Each call
+    sleeps ``latency + completion_tokens / tokens_per_second`` (``stream`` spreads the
+    second part over its chunks) and fails with a
+    rate-limit style error for a ``failure_rate`` share of (prompt, attempt) pairs.
+    Like Azure OpenAI, a system message of 1024+ tokens seen before is reported as
+    cached prompt tokens, in 128-token steps.
+    """
+
+    CACHE_MIN_TOKENS = 1024
+    CACHE_STEP_TOKENS = 128
+
+    CHUNK_CHARS = 64
+    deployment_name = "fake-deployment"
+    temperature = 0.0
+    top_p = 1.0
+    max_tokens = 32000
+
+    def __init__(self, latency: float = 0.2, tokens_per_second: float = 0.0, failure_rate: float = 0.0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.failure_rate = failure_rate
+        self._attempts: Dict[str, int] = {}
+        self._prefixes: set = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _text(prompt: Any) -> str:
+        if isinstance(prompt, str):
+            return prompt
+        return "\n".join(message[1] if isinstance(message, tuple) else getattr(message, "content", str(message))
+                         for message in prompt)
+
+    def _cached_tokens(self, prompt: Any) -> int:
+        if isinstance(prompt, str) or not prompt or not isinstance(prompt[0], tuple) or prompt[0][0] != "system":
+            return 0
+        prefix_tokens = estimate_tokens(prompt[0][1])
+        if prefix_tokens < self.CACHE_MIN_TOKENS:
+            return 0
+        digest = hashlib.sha256(prompt[0][1].encode("utf-8")).hexdigest()
+        with self._lock:
+            seen = digest in self._prefixes
+            self._prefixes.add(digest)
+        return prefix_tokens // self.CACHE_STEP_TOKENS * self.CACHE_STEP_TOKENS if seen else 0
+
+    def _should_fail(self, text: str) -> bool:
+        if self.failure_rate <= 0:
+            return False
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            attempt = self._attempts.get(digest, 0)
+            self._attempts[digest] = attempt + 1
+        roll = int(hashlib.sha256(f"{digest}:{attempt}".encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+        return roll < self.failure_rate
+
+    def invoke(self, prompt: Any, **kwargs: Any) -> FakeResponse:
+        text = self._text(prompt)
+        response = FakeResponse(self.answer(text), estimate_tokens(text), kwargs.get("max_tokens"),
+                                self._cached_tokens(prompt))
+        delay = self.latency
+        if self.tokens_per_second > 0:
+            delay += response.usage_metadata["output_tokens"] / self.tokens_per_second
+        time.sleep(delay)
+        if self._should_fail(text):
+            raise FakeRateLimitError("429 Too Many Requests (fake)")
+        return response
+
+    def stream(self, prompt: Any, **kwargs: Any):
+        # Same answers and timing as invoke, delivered in small chunks after the first-token latency.
+        text = self._text(prompt)
+        response = FakeResponse(self.answer(text), estimate_tokens(text), kwargs.get("max_tokens"),
+                                self._cached_tokens(prompt))
+        if self._should_fail(text):
+            time.sleep(self.latency)
+            raise FakeRateLimitError("429 Too Many Requests (fake)")
+        time.sleep(self.latency)
+        content = response.content
+        for offset in range(0, len(content), self.CHUNK_CHARS):
+            piece = content[offset:offset + self.CHUNK_CHARS]
+            if self.tokens_per_second > 0:
+                time.sleep(estimate_tokens(piece) / self.tokens_per_second)
+            yield FakeChunk(piece)
+        yield FakeChunk("", response.usage_metadata, response.response_metadata)
+
+    @staticmethod
+    def answer(text: str) -> str:
+        if "Extract features" in text:
+            titles = re.findall(r"Feature (\d+): ([^\n]+)", text)
+            return json.dumps([{"id": f"F-{int(number):03d}", "title": title.strip(),
+                                "description": f"Users can use {title.strip().lower()}."} for number, title in titles])
+        if "keyed by feature id" in text:
+            ids = dict.fromkeys(re.findall(r"\bF-\d+\b(?!_)", text))
+            return json.dumps({feature_id: FakeLLM._stories(feature_id) for feature_id in ids})
+        if "Generate user stories" in text:
+            return json.dumps(FakeLLM._stories(re.search(r"\bF-\d+\b(?!_)", text).group(0)))
+        if "keyed by user story id" in text:
+            ids = dict.fromkeys(re.findall(r"\bF-\d+_US-\d+\b(?!_)", text))
+            return json.dumps({story_id: FakeLLM._test_cases(story_id) for story_id in ids})
+        if "Generate test cases" in text:
+            return json.dumps(FakeLLM._test_cases(re.search(r"\bF-\d+_US-\d+\b(?!_)", text).group(0)))
+        if "shared page objects" in text:
+            tc_id = re.search(r"F-\d+_US-\d+_TC-\d+", text).group(0)
+            feature = tc_id.split("_")[0].replace("-", "").lower()
+            page = f"{feature.capitalize()}Page"
+            script = FAKE_PAGE_TEST.format(page=page, name=tc_id.replace("-", "_").lower())
+            # Only tests of a feature not yet in the library define its page class.
+            return script if f"class {page}(" in text else script + FAKE_PAGE_CLASS.format(page=page, feature=feature)
+        if "Selenium Python script" in text:
+            tc_id = re.search(r"F-\d+_US-\d+_TC-\d+", text).group(0)
+            return FAKE_SCRIPT.format(name=tc_id.replace("-", "_").lower())
+        if "Validate this Selenium script" in text:
+            return "Pass"
+        return "[]"
+
+    @staticmethod
+    def _stories(feature_id: str) -> List[Dict[str, Any]]:
+        return [{"id": f"{feature_id}_US-{n:03d}", "feature_id": feature_id, "story": f"As a user I want {feature_id} flow {n}"}
+                for n in range(1, STORIES_PER_FEATURE + 1)]
+
+    @staticmethod
+    def _test_cases(story_id: str) -> List[Dict[str, Any]]:
+        # Stories of one feature get the same test cases, like real near-duplicate output.
+        feature_id = story_id.split("_")[0]
+        return [{"id": f"{story_id}_TC-{n:03d}", "user_story_id": story_id,
+                 "steps": [f"Open the {feature_id} page", "Fill in the form", f"Submit variant {n}"],
+                 "expected_result": "A confirmation message is shown"}
+                for n in range(1, TEST_CASES_PER_STORY + 1)]
+
+
+# -------------------------------
+# Benchmark runner
+# -------------------------------
+def run_benchmark(feature_count: int, profile: Dict[str, Any]) -> Dict[str, Any]:
+    import resource
+
+    workdir = tempfile.mkdtemp(prefix=f"bench-{feature_count}-")
+    os.environ["LLM_CACHE_PATH"] = os.path.join(workdir, "llm_cache.sqlite")
+    os.environ["CHECKPOINT_DB"] = os.path.join(workdir, "checkpoints.sqlite")
+    os.environ["ARTIFACT_DB"] = os.path.join(workdir, "artifacts.sqlite")
+    os.environ["LLM_MAX_CONCURRENCY"] = str(profile["concurrency"])
+    os.environ["AZURE_OPENAI_RPM"] = str(profile["rpm"])
+    os.environ["AZURE_OPENAI_TPM"] = str(profile["tpm"])
+    os.environ.setdefault("AZURE_OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://benchmark.invalid")
+    os.environ.setdefault("AZURE_OPENAI_API_VERSION", "2024-12-01-preview")
+
+    import main
+
+    main.llm = FakeLLM(profile["latency"], profile["tokens_per_second"], profile["failure_rate"])
+    main.LLM_CACHE_ENABLED = False
+    main.LLM_BATCH_TOKENS = profile["batch_tokens"]
+    main.PAGE_OBJECT_MODE = profile.get("page_objects", False)
+    main.configure_folders(os.path.join(workdir, "requirement_docs"), os.path.join(workdir, "GEN-TESTSCRIPTS"),
+                           os.path.join(workdir, "generated_outputs"))
+
+    app = main.createLangraphApp(pipelined=profile["pipelined"])
+    start = time.time()
+    final_state = main.run_pipeline(app, synthetic_requirements(feature_count))
+    wall = time.time() - start
+
+    with open(final_state["run_report"], "r", encoding="utf-8") as f:
+        report = json.load(f)
+    calls = {c["labels"]["stage"]: c["value"] for c in report["counters"] if c["name"] == "llm_calls_total"}
+    errors = {c["labels"]["stage"]: c["value"] for c in report["counters"] if c["name"] == "llm_errors_total"}
+    budget_retries = sum(c["value"] for c in report["counters"] if c["name"] == "llm_budget_retries_total")
+    retries = sum(c["value"] for c in report["counters"] if c["name"] == "llm_retries_total")
+    prompt_tokens = sum(c["value"] for c in report["counters"] if c["name"] == "llm_prompt_tokens_total")
+    cached_tokens = sum(c["value"] for c in report["counters"] if c["name"] == "llm_cached_prompt_tokens_total")
+    scripts = len(final_state.get("selenium_scripts") or {})
+    return {
+        "features": feature_count,
+        "test_cases": len(final_state.get("test_cases") or []),
+        "scripts": scripts,
+        "deduplicated": len(final_state.get("duplicates") or {}),
+        "wall_seconds": round(wall, 3),
+        "items_per_second": round(scripts / wall, 3) if wall else 0.0,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "llm_calls_per_stage": calls,
+        "llm_errors_per_stage": errors,
+        "llm_budget_retries": budget_retries,
+        "llm_retries": retries,
+        "prompt_tokens": prompt_tokens,
+        "cached_prompt_tokens": cached_tokens,
+        "workdir": workdir,
+    }
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark with a fake LLM backend")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100], help="Feature counts of the synthetic docs")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fixed seconds per fake LLM call")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Fake generation rate (0 = instant)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of calls failing with a fake 429")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("LLM_MAX_CONCURRENCY", "4")))
+    parser.add_argument("--rpm", type=float, default=0, help="Requests/min limit for the scheduler (0 = unlimited)")
+    parser.add_argument("--tpm", type=float, default=0, help="Tokens/min limit for the scheduler (0 = unlimited)")
+    parser.add_argument("--batch-tokens", type=int, default=0, help="LLM_BATCH_TOKENS for the run")
+    parser.add_argument("--pipelined", action="store_true", help="Use the pipelined graph mode")
+    parser.add_argument("--page-objects", action="store_true", help="Generate tests against the shared page objects")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    profile = {"latency": args.latency, "tokens_per_second": args.tokens_per_second, "failure_rate": args.failure_rate,
+               "concurrency": args.concurrency, "batch_tokens": args.batch_tokens, "pipelined": args.pipelined,
+               "rpm": args.rpm, "tpm": args.tpm, "page_objects": args.page_objects}
+    results = []
+    # One fresh process per size keeps module state and peak RSS independent.
+    context = multiprocessing.get_context("spawn")
+    for size in args.sizes:
+        with context.Pool(1) as pool:
+            result = pool.apply(run_benchmark, (size, profile))
+        results.append(result)
+        print(json.dumps(result))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"profile": profile, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,145 @@
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List
+
+_HEADING = re.compile(r"^\s*(#{1,6}\s+\S|(\d+(\.\d+)*)[.)]?\s+[A-Z]\S*|[A-Z][A-Z0-9 &/\-]{3,}$)")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    # Imported on first use: tiktoken is optional and slow to import.
+    try:
+        import tiktoken
+    except ImportError:  # pragma: no cover - optional, falls back to a character heuristic
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+# -------------------------------
+# Splitting at section / paragraph boundaries
+# -------------------------------
+def _paragraphs(text: str) -> List[str]:
+    blocks = [block.strip() for block in re.split(r"\n\s*\n", text) if block.strip()]
+    if len(blocks) <= 1:
+        # DOCX extraction joins paragraphs with single newlines.
+        blocks = [line.strip() for line in text.splitlines() if line.strip()]
+    return blocks
+
+
+def _sections(paragraphs: List[str]) -> List[List[str]]:
+    sections: List[List[str]] = []
+    for paragraph in paragraphs:
+        if not sections or _HEADING.match(paragraph.splitlines()[0]):
+            sections.append([])
+        sections[-1].append(paragraph)
+    return sections
+
+
+def _split_oversized(paragraph: str, budget: int) -> List[str]:
+    pieces, current = [], ""
+    for sentence in _SENTENCE_END.split(paragraph):
+        candidate = f"{current} {sentence}".strip()
+        if current and estimate_tokens(candidate) > budget:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_by_token_budget(text: str, budget: int) -> List[str]:
+    # Whole sections are kept together when they fit; otherwise a section is split
+    # between paragraphs, and a single oversized paragraph between sentences.
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append("\n\n".join(current))
+        current, current_tokens = [], 0
+
+    for section in _sections(_paragraphs(text)):
+        section_text = "\n\n".join(section)
+        section_tokens = estimate_tokens(section_text)
+        if current_tokens + section_tokens <= budget:
+            current.append(section_text)
+            current_tokens += section_tokens
+            continue
+        flush()
+        if section_tokens <= budget:
+            current, current_tokens = [section_text], section_tokens
+            continue
+        for paragraph in section:
+            for piece in [paragraph] if estimate_tokens(paragraph) <= budget else _split_oversized(paragraph, budget):
+                piece_tokens = estimate_tokens(piece)
+                if current_tokens + piece_tokens > budget:
+                    flush()
+                current.append(piece)
+                current_tokens += piece_tokens
+        flush()
+    flush()
+    return chunks
+
+
+# -------------------------------
+# Merging features extracted per chunk
+# -------------------------------
+def _normalize_title(title: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", title.lower()).strip()
+
+
+def merge_features(feature_lists: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    # Features with the same normalised title are merged (the longer description wins)
+    # and ids are reassigned in order of first appearance, so they are stable run to run.
+    merged: Dict[str, Dict[str, Any]] = {}
+    for features in feature_lists:
+        for feature in features or []:
+            key = _normalize_title(str(feature.get("title", ""))) or _normalize_title(str(feature.get("description", "")))
+            if not key:
+                continue
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = dict(feature)
+            elif len(str(feature.get("description", ""))) > len(str(existing.get("description", ""))):
+                existing["description"] = feature["description"]
+
+    result = []
+    for index, feature in enumerate(merged.values(), start=1):
+        feature["id"] = f"F-{index:03d}"
+        result.append(feature)
+    return result
+
+
+# -------------------------------
+# Packing items into batches
+# -------------------------------
+def pack_by_token_budget(items: List[Any], budget: int, size: Callable[[Any], int]) -> List[List[Any]]:
+    # Greedy, order-preserving packing; an item larger than the budget gets a batch of its own.
+    batches: List[List[Any]] = []
+    current: List[Any] = []
+    current_tokens = 0
+    for item in items:
+        item_tokens = size(item)
+        if current and current_tokens + item_tokens > budget:
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += item_tokens
+    if current:
+        batches.append(current)
+    return batches
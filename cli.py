@@ -0,0 +1,268 @@
+"""Headless entry point for cron and CI.
+
+    python -m cli run requirement_docs --outputs out --scripts out/scripts
+    python -m cli batch specs/* --output-root nightly --workers 8 --max-llm-calls 16
+    python -m cli artifacts --diff <old run id> <new run id>
+
+Runs the same LangGraph pipeline as the Streamlit app without importing
+Streamlit, and prints a JSON summary of the run on stdout. Heavy dependencies
+(LangGraph, the Azure client, document parsers) are imported only when the
+stage that needs them runs, so argument errors and ``--help`` return at once.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+from records import Feature, coerce
+
+
+def summarize(final_state: Dict[str, Any], wall_seconds: float) -> Dict[str, Any]:
+    # Older checkpoints hold the features as a JSON string.
+    features = coerce(Feature, final_state.get("features"))
+    validation = final_state.get("validation_results") or {}
+    passed = sum(1 for result in validation.values() if str(result).strip().lower().startswith("pass"))
+    return {
+        "run_id": final_state.get("run_id"),
+        "features": len(features),
+        "user_stories": len(final_state.get("user_stories") or []),
+        "test_cases": len(final_state.get("test_cases") or []),
+        "scripts": len(final_state.get("selenium_scripts") or {}),
+        "deduplicated": len(final_state.get("duplicates") or {}),
+        "validation": {"passed": passed, "failed": len(validation) - passed},
+        "reused": final_state.get("reused") or {},
+        "resumed": final_state.get("resumed") or {},
+        "collated_docx": final_state.get("collated_docx"),
+        "run_report": final_state.get("run_report"),
+        "wall_seconds": round(wall_seconds, 3),
+    }
+
+
+def run_project(folder: str, scripts: str = None, outputs: str = None, pipelined: bool = None,
+                incremental: bool = False, resume: str = None) -> Tuple[int, Dict[str, Any]]:
+    import main
+    import rate_limiter
+
+    main.configure_folders(folder, scripts, outputs)
+    start = time.time()
+    run_id = resume
+    if run_id == "last":
+        run_id = main.last_run_id()
+        if run_id is None:
+            return 2, {"error": f"No previous run recorded in {main.OUTPUT_FOLDER}"}
+
+    # Also loaded when resuming: a run with no pending node is re-run with its journal replayed.
+    docs = main.load_requirement_docs(main.INPUT_REQ_DOCS_FOLDER)
+    if not run_id and not docs:
+        return 2, {"error": f"No requirement documents found in {main.INPUT_REQ_DOCS_FOLDER}"}
+
+    app = main.createLangraphApp(pipelined=pipelined)
+    try:
+        final_state = main.run_pipeline(app, docs, run_id=run_id, resume=bool(run_id), incremental=incremental,
+                                        priority=rate_limiter.BATCH)
+    except Exception as e:
+        return 1, {"error": str(e), "run_id": run_id or main.last_run_id(), "wall_seconds": round(time.time() - start, 3)}
+
+    summary = summarize(final_state or {}, time.time() - start)
+    summary["llm_cache"] = main.llm_cache.stats()
+    return 0, summary
+
+
+def run(args: argparse.Namespace) -> int:
+    if args.concurrency:
+        os.environ["LLM_MAX_CONCURRENCY"] = str(args.concurrency)
+    if args.checkpoint_db:
+        os.environ["CHECKPOINT_DB"] = args.checkpoint_db
+    if args.artifact_db:
+        os.environ["ARTIFACT_DB"] = args.artifact_db
+    code, summary = run_project(args.folder, args.scripts, args.outputs, args.pipelined, args.incremental, args.resume)
+    print(json.dumps(summary, indent=2 if args.pretty else None))
+    return code
+
+
+# -------------------------------
+# Batch mode: one isolated process per project folder
+# -------------------------------
+_batch_slots = None
+
+
+def _init_batch_worker(slots) -> None:
+    global _batch_slots
+    _batch_slots = slots
+
+
+def run_batch_project(project: str, folder: str, output_root: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    # Runs in a fresh spawned process, so main's module state (folders, checkpoint
+    # database, run journal, artifact store) belongs to this project alone.
+    project_dir = os.path.join(output_root, project)
+    os.environ["CHECKPOINT_DB"] = os.path.join(project_dir, ".cache", "checkpoints.sqlite")
+    os.environ["ARTIFACT_DB"] = os.path.join(project_dir, ".cache", "artifacts.sqlite")
+    os.environ["LLM_MAX_CONCURRENCY"] = str(options["concurrency"])
+    # Each project process runs its own scheduler with an equal share of the deployment quota.
+    os.environ["AZURE_OPENAI_RPM"] = str(options["rpm"])
+    os.environ["AZURE_OPENAI_TPM"] = str(options["tpm"])
+
+    import main
+
+    main.llm_slots = _batch_slots
+    try:
+        code, summary = run_project(folder, os.path.join(project_dir, "GEN-TESTSCRIPTS"),
+                                    os.path.join(project_dir, "generated_outputs"),
+                                    options["pipelined"], options["incremental"])
+    except Exception as e:
+        code, summary = 1, {"error": str(e)}
+    status = "succeeded" if code == 0 else "skipped" if code == 2 else "failed"
+    return {"project": project, "folder": folder, "status": status, **summary}
+
+
+def _run_batch_task(task: Tuple[str, str, str, Dict[str, Any]]) -> Dict[str, Any]:
+    project, folder = task[0], task[1]
+    try:
+        return run_batch_project(*task)
+    except Exception as e:
+        return {"project": project, "folder": folder, "status": "failed", "error": str(e)}
+
+
+def project_names(folders: List[str]) -> List[str]:
+    names, seen = [], {}
+    for folder in folders:
+        name = os.path.basename(os.path.normpath(folder)) or "project"
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else f"{name}-{seen[name]}")
+    return names
+
+
+def aggregate(results: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    totals = {key: 0 for key in ("features", "user_stories", "test_cases", "scripts", "passed", "failed")}
+    for result in results:
+        for key in ("features", "user_stories", "test_cases", "scripts"):
+            totals[key] += result.get(key, 0)
+        totals["passed"] += result.get("validation", {}).get("passed", 0)
+        totals["failed"] += result.get("validation", {}).get("failed", 0)
+    statuses = [result["status"] for result in results]
+    return {
+        "projects": len(results),
+        "succeeded": statuses.count("succeeded"),
+        "failed": statuses.count("failed"),
+        "skipped": statuses.count("skipped"),
+        "totals": totals,
+        "wall_seconds": round(wall_seconds, 3),
+        "results": results,
+    }
+
+
+def batch(args: argparse.Namespace) -> int:
+    folders = [folder for folder in args.folders if os.path.isdir(folder)]
+    for missing in sorted(set(args.folders) - set(folders)):
+        print(f"Not a folder, skipping: {missing}", file=sys.stderr)
+    if not folders:
+        print(json.dumps({"error": "No project folders to run"}))
+        return 2
+
+    workers = max(1, min(args.workers or os.cpu_count() or 1, len(folders)))
+    options = {"concurrency": min(args.concurrency, args.max_llm_calls), "pipelined": args.pipelined,
+               "incremental": args.incremental,
+               "rpm": float(os.getenv("AZURE_OPENAI_RPM", "0")) / workers,
+               "tpm": float(os.getenv("AZURE_OPENAI_TPM", "0")) / workers}
+    os.makedirs(args.output_root, exist_ok=True)
+    start = time.time()
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with context.Manager() as manager:
+        # Every project process acquires a slot from this one semaphore before each LLM call.
+        slots = manager.BoundedSemaphore(args.max_llm_calls)
+        # maxtasksperchild=1 starts a fresh process for every project (ProcessPoolExecutor's
+        # max_tasks_per_child needs Python 3.11).
+        with context.Pool(workers, initializer=_init_batch_worker, initargs=(slots,), maxtasksperchild=1) as pool:
+            tasks = [(project, folder, args.output_root, options)
+                     for project, folder in zip(project_names(folders), folders)]
+            for result in pool.imap_unordered(_run_batch_task, tasks):
+                print(f"{result['project']}: {result['status']}", file=sys.stderr)
+                results.append(result)
+
+    results.sort(key=lambda result: result["project"])
+    summary = aggregate(results, time.time() - start)
+    with open(os.path.join(args.output_root, "batch_summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    print(json.dumps(summary, indent=2 if args.pretty else None))
+    return 0 if summary["failed"] == 0 else 1
+
+
+# -------------------------------
+# Artifact queries (no pipeline run)
+# -------------------------------
+def artifacts(args: argparse.Namespace) -> int:
+    from artifact_store import ArtifactStore
+
+    store = ArtifactStore(args.artifact_db or os.getenv("ARTIFACT_DB", os.path.join(".cache", "artifacts.sqlite")))
+    if args.diff:
+        result = store.diff_runs(args.diff[0], args.diff[1])
+    elif args.feature:
+        result = store.by_feature(args.feature, args.run)
+    elif args.status:
+        result = store.by_status(args.status, args.run)
+    elif args.run:
+        result = store.by_run(args.run)
+    else:
+        result = {"runs": store.runs(), "stats": store.stats()}
+    print(json.dumps(result, indent=2 if args.pretty else None))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Headless test script generation")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the pipeline over a folder of requirement documents")
+    run_parser.add_argument("folder", help="Folder with the requirement documents (.pdf, .docx)")
+    run_parser.add_argument("--scripts", help="Folder for the generated Selenium scripts (default: GEN_SCRIPT_FOLDER)")
+    run_parser.add_argument("--outputs", help="Folder for the report, manifests and run reports (default: OUTPUT_FOLDER)")
+    run_parser.add_argument("--checkpoint-db", help="SQLite file for checkpoints and the run journal (default: CHECKPOINT_DB)")
+    run_parser.add_argument("--artifact-db", help="SQLite index of generated artifacts across runs (default: ARTIFACT_DB)")
+    mode = run_parser.add_mutually_exclusive_group()
+    mode.add_argument("--pipelined", dest="pipelined", action="store_true", default=None, help="Use the pipelined graph")
+    mode.add_argument("--staged", dest="pipelined", action="store_false", help="Use the stage-by-stage graph")
+    run_parser.add_argument("--incremental", action="store_true", help="Reuse outputs of unchanged items from earlier runs")
+    run_parser.add_argument("--resume", metavar="RUN_ID", help="Resume an interrupted run ('last' for the most recent)")
+    run_parser.add_argument("--concurrency", type=int, help="Maximum concurrent LLM calls (LLM_MAX_CONCURRENCY)")
+    run_parser.add_argument("--pretty", action="store_true", help="Indent the JSON summary")
+    run_parser.set_defaults(handler=run)
+
+    batch_parser = subparsers.add_parser("batch", help="Run many requirement folders as isolated projects in parallel")
+    batch_parser.add_argument("folders", nargs="+", help="One requirement folder per project")
+    batch_parser.add_argument("--output-root", default="batch_outputs",
+                              help="Each project writes to <output-root>/<folder name>/ (default: batch_outputs)")
+    batch_parser.add_argument("--workers", type=int, help="Projects run at the same time (default: CPU count)")
+    batch_parser.add_argument("--max-llm-calls", type=int, default=int(os.getenv("BATCH_LLM_CONCURRENCY", "16")),
+                              help="LLM calls in flight across all projects (BATCH_LLM_CONCURRENCY)")
+    batch_parser.add_argument("--concurrency", type=int, default=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+                              help="LLM calls in flight per project (LLM_MAX_CONCURRENCY)")
+    batch_mode = batch_parser.add_mutually_exclusive_group()
+    batch_mode.add_argument("--pipelined", dest="pipelined", action="store_true", default=None, help="Use the pipelined graph")
+    batch_mode.add_argument("--staged", dest="pipelined", action="store_false", help="Use the stage-by-stage graph")
+    batch_parser.add_argument("--incremental", action="store_true", help="Reuse outputs of unchanged items from earlier runs")
+    batch_parser.add_argument("--pretty", action="store_true", help="Indent the JSON summary")
+    batch_parser.set_defaults(handler=batch)
+
+    artifacts_parser = subparsers.add_parser("artifacts", help="Query generated artifacts across runs")
+    artifacts_parser.add_argument("--artifact-db", help="SQLite index of generated artifacts (default: ARTIFACT_DB)")
+    artifacts_parser.add_argument("--run", help="Items of this run (default for --feature/--status: the latest run)")
+    query = artifacts_parser.add_mutually_exclusive_group()
+    query.add_argument("--feature", help="The feature with its user stories, test cases, scripts and validation")
+    query.add_argument("--status", choices=("pass", "fail"), help="Test cases with this validation status")
+    query.add_argument("--diff", nargs=2, metavar=("OLD_RUN", "NEW_RUN"), help="Test cases added, removed or changed")
+    artifacts_parser.add_argument("--pretty", action="store_true", help="Indent the JSON output")
+    artifacts_parser.set_defaults(handler=artifacts)
+    return parser
+
+
+def main_cli(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
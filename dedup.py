@@ -0,0 +1,115 @@
+import hashlib
+import re
+import threading
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from records import Record, plain
+
+NUM_PERMUTATIONS = 64
+BANDS = 16  # 16 bands x 4 rows: pairs above ~0.5 Jaccard become candidates
+SHINGLE_WORDS = 3
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_WORD = re.compile(r"[a-z0-9]+")
+# Numbers and quoted values: boundary and equivalence-class cases differ only in these.
+_LITERAL = re.compile(r"""\d+(?:[.,]\d+)*|"[^"\n]*"|(?<!\w)'[^'\n]*'(?!\w)|“[^”\n]*”|‘[^’\n]*’""")
+
+
+def _hash64(text: str, seed: int = 0) -> int:
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8, salt=seed.to_bytes(8, "little")).digest()
+    return int.from_bytes(digest, "little")
+
+
+# Fixed coefficients so signatures are identical across runs and processes.
+_PERMUTATIONS = [(_hash64("a", seed) % _MERSENNE_PRIME or 1, _hash64("b", seed) % _MERSENNE_PRIME)
+                 for seed in range(NUM_PERMUTATIONS)]
+
+
+def item_text(item: Record) -> str:
+    # Everything but the identifiers, which differ between otherwise identical items.
+    def flatten(value: Any) -> str:
+        if isinstance(value, dict):
+            return " ".join(flatten(v) for k, v in value.items() if k != "id" and not k.endswith("_id"))
+        if isinstance(value, (list, tuple)):
+            return " ".join(flatten(v) for v in value)
+        return str(value)
+
+    return flatten(plain(item))
+
+
+def literals(text: str) -> FrozenSet[str]:
+    return frozenset(literal.strip().lower() for literal in _LITERAL.findall(text))
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> FrozenSet[str]:
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return frozenset([" ".join(words)]) if words else frozenset()
+    return frozenset(" ".join(words[i:i + size]) for i in range(len(words) - size + 1))
+
+
+def minhash(shingle_set: FrozenSet[str]) -> Tuple[int, ...]:
+    hashes = [_hash64(shingle) for shingle in shingle_set] or [0]
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def jaccard(left: FrozenSet[str], right: FrozenSet[str]) -> float:
+    if not left and not right:
+        return 1.0
+    return len(left & right) / len(left | right)
+
+
+class NearDuplicateIndex:
+    """Greedy leader clustering of items with MinHash/LSH candidate lookup.
+
+    ``add`` returns the id of an earlier representative whose content has a shingle
+    Jaccard similarity of at least ``threshold`` and the same numbers and quoted values,
+    or ``None`` when the item becomes a representative itself. Candidates come from the
+    LSH buckets and are confirmed on the exact shingle sets, so false positives never
+    merge items, and boundary-value pairs (7 vs 129 characters) stay separate.
+    """
+
+    def __init__(self, threshold: float = 0.9):
+        self.threshold = threshold
+        self._rows = NUM_PERMUTATIONS // BANDS
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[str]] = {}
+        self._shingles: Dict[str, FrozenSet[str]] = {}
+        self._literals: Dict[str, FrozenSet[str]] = {}
+        self.duplicates: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def add(self, item_id: str, item: Record) -> Optional[str]:
+        text = item_text(item)
+        shingle_set, literal_set = shingles(text), literals(text)
+        signature = minhash(shingle_set)
+        bands = [(band, signature[band * self._rows:(band + 1) * self._rows]) for band in range(BANDS)]
+        with self._lock:
+            if item_id in self.duplicates:
+                return self.duplicates[item_id]
+            if item_id in self._shingles:
+                return None
+            seen = set()
+            for band in bands:
+                for candidate in self._buckets.get(band, ()):
+                    if candidate not in seen:
+                        seen.add(candidate)
+                        if (literal_set == self._literals[candidate]
+                                and jaccard(shingle_set, self._shingles[candidate]) >= self.threshold):
+                            self.duplicates[item_id] = candidate
+                            return candidate
+            self._shingles[item_id] = shingle_set
+            self._literals[item_id] = literal_set
+            for band in bands:
+                self._buckets.setdefault(band, []).append(item_id)
+            return None
+
+    @property
+    def representatives(self) -> int:
+        return len(self._shingles)
+
+
+def cluster_items(items: List[Record], threshold: float = 0.9) -> Tuple[List[Record], Dict[str, str]]:
+    # Returns the representatives in input order and a member id -> representative id map.
+    index = NearDuplicateIndex(threshold)
+    representatives = [item for item in items if index.add(item.id, item) is None]
+    return representatives, dict(index.duplicates)
@@ -0,0 +1,153 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("TestScriptGenerationAgent")
+
+SUPPORTED_EXTENSIONS = (".docx", ".pdf")
+
+# PDFs with more pages than this are split into page ranges extracted in parallel.
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "50"))
+DOC_EXTRACT_WORKERS = int(os.getenv("DOC_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+DOC_CACHE_FOLDER = os.getenv("DOC_CACHE_FOLDER", os.path.join(".cache", "docs"))
+
+# Survives Streamlit reruns because this module is imported, not re-executed.
+_memory_cache: Dict[str, str] = {}
+
+
+# -------------------------------
+# Extraction workers (run in child processes)
+# -------------------------------
+def iter_pdf_pages(file_path: str, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+    import fitz  # PyMuPDF for PDF reading
+
+    with fitz.open(file_path) as pdf:
+        stop = pdf.page_count if stop is None else min(stop, pdf.page_count)
+        for page_number in range(start, stop):
+            yield pdf[page_number].get_text("text")
+
+
+def extract_pdf_range(file_path: str, start: int = 0, stop: Optional[int] = None) -> str:
+    return "\n".join(iter_pdf_pages(file_path, start, stop))
+
+
+def extract_docx(file_path: str) -> str:
+    from docx import Document as DocxDocument
+
+    doc = DocxDocument(file_path)
+    return "\n".join(p.text for p in doc.paragraphs if p.text.strip())
+
+
+def pdf_page_count(file_path: str) -> int:
+    import fitz
+
+    with fitz.open(file_path) as pdf:
+        return pdf.page_count
+
+
+# -------------------------------
+# Cache keyed on path, mtime and size
+# -------------------------------
+def cache_key(file_path: str) -> str:
+    stat = os.stat(file_path)
+    raw = f"{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(DOC_CACHE_FOLDER, f"{key}.txt")
+
+
+def get_cached_text(key: str) -> Optional[str]:
+    if key in _memory_cache:
+        return _memory_cache[key]
+    path = _cache_path(key)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        _memory_cache[key] = text
+        return text
+    return None
+
+
+def put_cached_text(key: str, text: str) -> None:
+    _memory_cache[key] = text
+    os.makedirs(DOC_CACHE_FOLDER, exist_ok=True)
+    tmp_path = f"{_cache_path(key)}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, _cache_path(key))
+
+
+# -------------------------------
+# Loading
+# -------------------------------
+def _plan_tasks(file_path: str) -> List[Tuple]:
+    if file_path.lower().endswith(".docx"):
+        return [(extract_docx, file_path)]
+    page_count = pdf_page_count(file_path)
+    return [
+        (extract_pdf_range, file_path, start, min(start + PDF_PAGES_PER_TASK, page_count))
+        for start in range(0, max(page_count, 1), PDF_PAGES_PER_TASK)
+    ]
+
+
+def _run_tasks(tasks: List[Tuple], max_workers: int) -> List:
+    if max_workers <= 1 or len(tasks) <= 1:
+        return [_call(task) for task in tasks]
+    # spawn keeps the children independent of Streamlit's threads.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks)), mp_context=context) as executor:
+        futures = [executor.submit(_call, task) for task in tasks]
+        return [future.result() for future in futures]
+
+
+def _call(task: Tuple):
+    func, *args = task
+    try:
+        return func(*args)
+    except Exception as e:
+        return e
+
+
+def load_documents(file_paths: List[str], max_workers: int = None) -> List[str]:
+    max_workers = max_workers or DOC_EXTRACT_WORKERS
+    texts: Dict[str, str] = {}
+    pending: Dict[str, Tuple[str, List[Tuple]]] = {}
+    for file_path in file_paths:
+        try:
+            key = cache_key(file_path)
+            cached = get_cached_text(key)
+            if cached is not None:
+                texts[file_path] = cached
+            else:
+                pending[file_path] = (key, _plan_tasks(file_path))
+        except Exception as e:
+            logger.warning(f"Could not read file {file_path}: {e}")
+
+    if pending:
+        tasks = [task for _, file_tasks in pending.values() for task in file_tasks]
+        logger.info(f"Extracting {len(pending)} documents in {len(tasks)} tasks ({len(texts)} served from cache).")
+        results = iter(_run_tasks(tasks, max_workers))
+        for file_path, (key, file_tasks) in pending.items():
+            parts = [next(results) for _ in file_tasks]
+            errors = [part for part in parts if isinstance(part, Exception)]
+            if errors:
+                logger.warning(f"An unexpected error occurred while reading {file_path}: {errors[0]}")
+                continue
+            text = "\n".join(parts).strip()
+            put_cached_text(key, text)
+            texts[file_path] = text
+
+    return [texts[file_path] for file_path in file_paths if file_path in texts]
+
+
+def list_requirement_files(folder_path: str) -> List[str]:
+    return [
+        os.path.join(folder_path, file_name)
+        for file_name in sorted(os.listdir(folder_path))
+        if file_name.lower().endswith(SUPPORTED_EXTENSIONS)
+    ]
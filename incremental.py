@@ -0,0 +1,102 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from records import plain
+
+logger = logging.getLogger("TestScriptGenerationAgent")
+
+
+def fingerprint(item: Any) -> str:
+    payload = json.dumps(plain(item), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class GenerationManifest:
+    """Maps the fingerprint of each stage input to the output generated for it last run.
+
+    Each stage owns one section of the manifest ("features" -> user stories,
+    "user_stories" -> test cases, "test_cases" -> script file). A node loads the
+    manifest, reuses any output whose input fingerprint is unchanged and then saves
+    its section with only the entries seen in this run, so stale entries drop out.
+    """
+
+    def __init__(self, path: str, stage: str):
+        self.path = path
+        self.stage = stage
+        self.reused = 0
+        self.generated = 0
+        self._lock = threading.Lock()
+        self._sections: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._sections = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read generation manifest {path}. Starting fresh. {e}")
+        self._previous = self._sections.get(stage, {})
+        self._current: Dict[str, Any] = {}
+
+    def lookup(self, item: Any, is_valid: Optional[Callable[[Any], bool]] = None) -> Optional[Any]:
+        key = fingerprint(item)
+        output = self._previous.get(key)
+        if output is not None and is_valid is not None and not is_valid(output):
+            return None
+        if output is not None:
+            with self._lock:
+                self._current[key] = output
+                self.reused += 1
+        return output
+
+    def record(self, item: Any, output: Any) -> None:
+        with self._lock:
+            self._current[fingerprint(item)] = output
+            self.generated += 1
+
+    def save(self) -> None:
+        # Re-read first so that stages saving one after another keep each other's sections.
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._sections = json.load(f)
+            except (OSError, ValueError):
+                pass
+        self._sections[self.stage] = self._current
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._sections, f)
+        os.replace(tmp_path, self.path)
+        logger.info(f"Incremental [{self.stage}]: reused {self.reused}, regenerated {self.generated}.")
+
+
+class StageStore:
+    """Output reuse for one stage: the current run's journal first (resume), then the
+    previous run's manifest (incremental mode). New outputs are written to both."""
+
+    def __init__(self, stage: str, manifest: Optional[GenerationManifest] = None, journal: Any = None):
+        self.stage = stage
+        self.manifest = manifest
+        self.journal = journal
+        self.resumed = 0
+
+    def lookup(self, item: Any, is_valid: Optional[Callable[[Any], bool]] = None) -> Optional[Any]:
+        if self.journal is not None:
+            output = self.journal.lookup(item, is_valid)
+            if output is not None:
+                self.resumed += 1
+                if self.manifest is not None:
+                    self.manifest.record(item, output)
+                return output
+        if self.manifest is not None:
+            return self.manifest.lookup(item, is_valid)
+        return None
+
+    def record(self, item: Any, output: Any) -> None:
+        output = plain(output)
+        if self.journal is not None:
+            self.journal.record(item, output)
+        if self.manifest is not None:
+            self.manifest.record(item, output)
@@ -0,0 +1,162 @@
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger("TestScriptGenerationAgent")
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Job the current code runs for; copied into worker threads along with the context.
+current_job: contextvars.ContextVar[Optional["Job"]] = contextvars.ContextVar("current_job", default=None)
+
+
+class Job:
+    def __init__(self, job_id: str, description: str, log_lines: int):
+        self.id = job_id
+        self.description = description
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.result: Any = None
+        self.current_node: Optional[str] = None
+        self.logs: deque = deque(maxlen=log_lines)
+        self._progress: Dict[str, Dict[str, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add_total(self, stage: str, count: int) -> None:
+        with self._lock:
+            self._progress.setdefault(stage, {"done": 0, "total": 0})["total"] += count
+
+    def advance(self, stage: str, count: int = 1) -> None:
+        with self._lock:
+            self._progress.setdefault(stage, {"done": 0, "total": 0})["done"] += count
+
+    def log(self, line: str) -> None:
+        with self._lock:
+            self.logs.append(line)
+
+    def log_tail(self, count: int) -> List[str]:
+        with self._lock:
+            return list(self.logs)[-count:]
+
+    def progress(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {stage: dict(counts) for stage, counts in self._progress.items()}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "description": self.description,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "current_node": self.current_node,
+            "progress": self.progress(),
+        }
+
+
+class JobManager:
+    """Runs pipeline jobs on background threads so they outlive the Streamlit script run
+    (and the browser tab) that submitted them. Keeps the most recent ``max_jobs`` jobs."""
+
+    def __init__(self, max_workers: int = 2, max_jobs: int = 20, log_lines: int = 500):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline-job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_jobs = max_jobs
+        self.log_lines = log_lines
+
+    def submit(self, func: Callable[..., Any], *args: Any, description: str = "", **kwargs: Any) -> str:
+        # The id is the only way to reattach to a job from another session, so it is not guessable.
+        job = Job(uuid.uuid4().hex, description, self.log_lines)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if oldest.status in (QUEUED, RUNNING):
+                    break
+                del self._jobs[oldest_id]
+        self._executor.submit(self._run, job, func, args, kwargs)
+        logger.info(f"Submitted job {job.id} {description}")
+        return job.id
+
+    def _run(self, job: Job, func: Callable[..., Any], args, kwargs) -> None:
+        current_job.set(job)
+        job.status, job.started_at = RUNNING, time.time()
+        try:
+            job.result = func(*args, **kwargs)
+            job.status = SUCCEEDED
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+            logger.error(f"Job {job.id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [job.snapshot() for job in self._jobs.values()]
+
+
+class JobLogHandler(logging.Handler):
+    # Appends each record to the ring buffer of the job that emitted it; O(1) per record.
+    def emit(self, record: logging.LogRecord) -> None:
+        job = current_job.get()
+        if job is not None:
+            job.log(self.format(record))
+
+
+# -------------------------------
+# Progress API used by the pipeline (no-ops outside a job)
+# -------------------------------
+def report_total(stage: str, count: int) -> None:
+    job = current_job.get()
+    if job is not None:
+        job.add_total(stage, count)
+
+
+def report_done(stage: str, count: int = 1) -> None:
+    job = current_job.get()
+    if job is not None:
+        job.advance(stage, count)
+
+
+def report_node(node_name: str) -> None:
+    job = current_job.get()
+    if job is not None:
+        job.current_node = node_name
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    # One manager per process; this module is imported (not re-run) by Streamlit, so it
+    # survives reruns and is shared by every session. The log handler is attached once.
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+            handler = JobLogHandler()
+            handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+            root = logging.getLogger()
+            root.setLevel(logging.INFO)
+            root.addHandler(handler)
+        return _manager
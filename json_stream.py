@@ -0,0 +1,73 @@
+import json
+from typing import Any, List
+
+
+class JsonArrayStream:
+    """Incremental parser for a streamed top-level JSON array.
+
+    ``feed`` takes the next chunk of text and returns every array element that was
+    completed by it, already decoded, so callers can act on the first item while the
+    rest of the response is still being generated. Text before the opening ``[``
+    (e.g. a stray preamble) is ignored; ``close`` checks the array was terminated.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []  # characters of the element being read
+        self._started = False
+        self._finished = False
+        self._depth = 0               # nesting inside the current element
+        self._in_string = False
+        self._escape = False
+        self.items: List[Any] = []
+
+    def feed(self, chunk: str) -> List[Any]:
+        completed = []
+        for char in chunk:
+            if self._finished:
+                break
+            if not self._started:
+                if char == "[":
+                    self._started = True
+                continue
+            if self._in_string:
+                self._buffer.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if self._depth == 0 and char in ",]":
+                self._flush(completed)
+                if char == "]":
+                    self._finished = True
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+            self._buffer.append(char)
+        return completed
+
+    def _flush(self, completed: List[Any]) -> None:
+        text = "".join(self._buffer).strip()
+        self._buffer = []
+        if not text:
+            return
+        item = json.loads(text)
+        self.items.append(item)
+        completed.append(item)
+
+    def close(self) -> List[Any]:
+        if not self._finished:
+            raise ValueError("Streamed JSON array was not terminated")
+        return self.items
+
+
+def parse_json_array(content: str) -> List[Any]:
+    stream = JsonArrayStream()
+    stream.feed(content)
+    return stream.close()
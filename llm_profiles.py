@@ -0,0 +1,71 @@
+import math
+import os
+from typing import Dict
+
+from chunking import estimate_tokens
+
+# One profile per kind of prompt; "default" covers anything else.
+PROFILE_NAMES = ("default", "features", "user_stories", "test_cases", "scripts", "test_bodies", "review")
+
+# Expected answer size relative to the prompt, and the smallest budget ever reserved.
+OUTPUT_RATIOS = {"default": 4.0, "features": 1.0, "user_stories": 4.0, "test_cases": 6.0, "scripts": 8.0,
+                 "test_bodies": 1.0, "review": 0.5}
+MIN_OUTPUT_TOKENS = {"default": 2048, "features": 2048, "user_stories": 1024, "test_cases": 2048, "scripts": 4096,
+                     "test_bodies": 1024, "review": 512}
+
+
+class LLMProfile:
+    """Deployment, sampling settings and output token budget for one kind of prompt.
+
+    ``output_budget`` sizes ``max_tokens`` from the prompt, so a short story list no
+    longer reserves the full 32k quota; prompts whose budget is at most
+    ``small_task_tokens`` are routed to ``small_deployment`` when one is configured.
+    """
+
+    def __init__(self, name: str, deployment: str, max_tokens: int, temperature: float, top_p: float,
+                 output_ratio: float, min_tokens: int, small_deployment: str = None, small_task_tokens: int = 0):
+        self.name = name
+        self.deployment = deployment
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.top_p = top_p
+        self.output_ratio = output_ratio
+        self.min_tokens = min_tokens
+        self.small_deployment = small_deployment
+        self.small_task_tokens = small_task_tokens
+
+    def output_budget(self, prompt: str) -> int:
+        estimate = math.ceil(estimate_tokens(prompt) * self.output_ratio)
+        return min(self.max_tokens, max(self.min_tokens, estimate))
+
+    def deployment_for(self, budget: int) -> str:
+        if self.small_deployment and budget <= self.small_task_tokens:
+            return self.small_deployment
+        return self.deployment
+
+
+def _setting(name: str, key: str, default):
+    return os.getenv(f"LLM_PROFILE_{name.upper()}_{key}", default)
+
+
+def load_profiles() -> Dict[str, LLMProfile]:
+    # LLM_PROFILE_<NAME>_<SETTING> overrides a single profile, e.g.
+    # LLM_PROFILE_SCRIPTS_DEPLOYMENT=gpt-4o or LLM_PROFILE_REVIEW_MAX_TOKENS=1000.
+    deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT")
+    small_deployment = os.getenv("AZURE_OPENAI_SMALL_DEPLOYMENT")
+    small_task_tokens = int(os.getenv("SMALL_TASK_MAX_TOKENS", "2048"))
+    max_tokens = int(os.getenv("LLM_MAX_TOKENS", "32000"))
+    return {
+        name: LLMProfile(
+            name,
+            deployment=_setting(name, "DEPLOYMENT", deployment),
+            max_tokens=int(_setting(name, "MAX_TOKENS", max_tokens)),
+            temperature=float(_setting(name, "TEMPERATURE", "0.23")),
+            top_p=float(_setting(name, "TOP_P", "0.9")),
+            output_ratio=float(_setting(name, "OUTPUT_RATIO", OUTPUT_RATIOS[name])),
+            min_tokens=int(_setting(name, "MIN_TOKENS", MIN_OUTPUT_TOKENS[name])),
+            small_deployment=_setting(name, "SMALL_DEPLOYMENT", small_deployment),
+            small_task_tokens=small_task_tokens,
+        )
+        for name in PROFILE_NAMES
+    }
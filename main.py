@@ -1,19 +1,62 @@
 import os
 import json
+import importlib
 from dotenv import load_dotenv
-from typing import TypedDict, List, Dict, Any
-from langgraph.graph import StateGraph, END
-from langchain_openai import AzureChatOpenAI
-from docx import Document as DocxDocument
-import fitz  # PyMuPDF for PDF reading
+from typing import TypedDict, List, Dict, Any, Optional
 import logging
 import time
-from md2docx_python.src.md2docx_python import markdown_to_word
-import streamlit as st
-import base64
+import contextvars
+import functools
+import heapq
+import queue
+import contextlib
+from types import SimpleNamespace
+import threading
+import sqlite3
+import uuid
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import math
+import zipfile
+from llm_cache import LLMCache
+from incremental import GenerationManifest, StageStore, fingerprint
+from run_journal import RunJournal
+from artifact_store import FEATURE, TEST_CASE, USER_STORY, ArtifactStore
+import doc_loader
+import metrics
+import jobs
+from script_validator import AMBIGUOUS, format_result, validate_files
+from json_stream import JsonArrayStream, parse_json_array
+from report_renderer import render_report
+import page_objects
+import prompts
+from prompts import Prompt
+from dedup import NearDuplicateIndex, cluster_items
+from records import CHECKPOINT_TYPES, Feature, RecordIndex, TestCase, UserStory, coerce, summarize
+from llm_profiles import LLMProfile, load_profiles
+from rate_limiter import current_priority, get_scheduler, is_rate_limited, is_retryable, retry_delay
+import rate_limiter
+from chunking import estimate_tokens, merge_features, pack_by_token_budget, split_by_token_budget
 
 load_dotenv()
 
+
+class LazyModule:
+    # Defers importing heavy dependencies (streamlit, langgraph, langchain, python-docx) until a
+    # stage actually touches them, so headless runs and `--help` start quickly.
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+st = LazyModule("streamlit")
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -26,32 +69,27 @@ logging.basicConfig(
 
 logger = logging.getLogger("TestScriptGenerationAgent")
 
-class StreamlitLogger(logging.Handler):
-    def __init__(self, placeholder):
-        super().__init__()
-        self.placeholder = placeholder
-        self.logs = []
-
-    def emit(self, record):
-        log_entry = self.format(record)
-        self.logs.append(log_entry)
-        # Display logs in real-time
-        self.placeholder.text("\n".join(self.logs[-15:]))  # keep last 15 lines visible
-
 def telemetry(node_name):
     def decorator(func):
+        @functools.wraps(func)
         def wrapper(state, *args, **kwargs):
             start = time.time()
             logger.info(f"Starting node: {node_name}")
-            try:
-                result = func(state, *args, **kwargs)
-                duration = time.time() - start
-                logger.info(f"Completed node: {node_name} in {duration:.2f}s")
-                return result
-            except Exception as e:
-                duration = time.time() - start
-                logger.error(f"Failed node: {node_name} in {duration:.2f}s with error: {e}")
-                raise
+            jobs.report_node(node_name)
+            # LLM calls, queue waits and bytes written inside the node are labelled with its name.
+            with metrics.stage(node_name):
+                try:
+                    result = func(state, *args, **kwargs)
+                    duration = time.time() - start
+                    metrics.observe("node_latency_seconds", duration, node=node_name)
+                    logger.info(f"Completed node: {node_name} in {duration:.2f}s")
+                    return result
+                except Exception as e:
+                    duration = time.time() - start
+                    metrics.observe("node_latency_seconds", duration, node=node_name)
+                    metrics.inc("node_failures_total", node=node_name)
+                    logger.error(f"Failed node: {node_name} in {duration:.2f}s with error: {e}")
+                    raise
         return wrapper
     return decorator
 
@@ -61,14 +99,22 @@ def telemetry(node_name):
 class AgentState(TypedDict, total=False):
     requirement_docs: List[str]
 
-    features: List[Dict[str, Any]]
-    user_stories: List[Dict[str, Any]]
-    test_cases: List[Dict[str, Any]]
+    features: List[Feature]
+    user_stories: List[UserStory]
+    test_cases: List[TestCase]
     selenium_scripts: Dict[str, str]
+    duplicates: Dict[str, str]
     validation_results: Dict[str, str]
 
     collated_docx: str
 
+    incremental: bool
+    reused: Dict[str, int]
+
+    run_id: str
+    resumed: Dict[str, int]
+    run_report: str
+
 @telemetry("UI Upload")
 def upload_file(uploaded_file):
     if uploaded_file is not None:
@@ -80,48 +126,11 @@ def upload_file(uploaded_file):
 # -------------------------------
 # 2. Helpers to read documents
 # -------------------------------
-@telemetry("Read Docx")
-def read_docx(file_path: str) -> str:
-    try:
-        doc = DocxDocument(file_path)
-        return "\n".join([p.text for p in doc.paragraphs if p.text.strip()])
-    except ValueError as e:
-        logger.warning(f"Could not read file {file_path}: {e}")
-    except FileNotFoundError:
-        logger.warning(f"File not found: {file_path}")
-    except Exception as e:
-        logger.warning(f"An unexpected error occurred while reading {file_path}: {e}")
-
-
-@telemetry("Read Pdf")
-def read_pdf(file_path: str) -> str:
-    try:
-        text = ""
-        with fitz.open(file_path) as pdf:
-            for page in pdf:
-                text += page.get_text("text") + "\n"
-        return text.strip()
-    except ValueError as e:
-        logger.warning(f"Could not read file {file_path}: {e}")
-    except FileNotFoundError:
-        logger.warning(f"File not found: {file_path}")
-    except Exception as e:
-        logger.warning(f"An unexpected error occurred while reading {file_path}: {e}")
-
-
 @telemetry("Load Requirement Doc")
 def load_requirement_docs(folder_path: str) -> List[str]:
-    docs = []
-    for file_name in os.listdir(folder_path):
-
-        file_path = os.path.join(folder_path, file_name)
-        if file_name.lower().endswith(".docx"):
-            docs.append(read_docx(file_path))
-        elif file_name.lower().endswith(".pdf"):
-            docs.append(read_pdf(file_path))
-    return docs
-
-    
+    # Files are extracted in a process pool (large PDFs split by page range) and the
+    # text is cached on path, mtime and size, so unchanged files are never re-parsed.
+    return doc_loader.load_documents(doc_loader.list_requirement_files(folder_path))
 
 
 # -------------------------------
@@ -138,238 +147,928 @@ def load_requirement_docs(folder_path: str) -> List[str]:
 # )
 
 
-llm = AzureChatOpenAI(
-    openai_api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-    deployment_name=os.getenv("AZURE_OPENAI_DEPLOYMENT"),
-    openai_api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    temperature=0.23,
-    top_p=0.9,
-    max_tokens=32000,
+# Stand-in client used for every profile instead of Azure (see benchmark.py). When None,
+# get_llm() builds one AzureChatOpenAI per deployment and sampling settings on first use.
+llm = None
+llm_profiles = load_profiles()
+_clients: Dict[tuple, Any] = {}
+_llm_lock = threading.Lock()
+
+
+def get_llm(profile: LLMProfile = None, deployment: str = None):
+    if llm is not None:
+        return llm
+    profile = profile or llm_profiles["default"]
+    deployment = deployment or profile.deployment
+    key = (deployment, profile.temperature, profile.top_p)
+    with _llm_lock:
+        if key not in _clients:
+            from langchain_openai import AzureChatOpenAI
+
+            _clients[key] = AzureChatOpenAI(
+                openai_api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+                azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+                deployment_name=deployment,
+                openai_api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+                temperature=profile.temperature,
+                top_p=profile.top_p,
+                max_tokens=profile.max_tokens,
+                stream_usage=True,
+                max_retries=0,  # retried by with_llm_retries under the shared scheduler
+            )
+        return _clients[key]
+
+# Max number of LLM calls in flight for the per-item stages; 1 keeps the old serial behaviour.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+# Run each feature through stories, test cases and scripts independently instead of stage by stage.
+PIPELINED_MODE = os.getenv("PIPELINED_MODE", "0") == "1"
+
+# Requirement text above this many tokens is split into chunks for feature extraction.
+FEATURE_CHUNK_TOKENS = int(os.getenv("FEATURE_CHUNK_TOKENS", "12000"))
+
+# Input-token budget per batched user story / test case prompt; 0 sends one prompt per item.
+LLM_BATCH_TOKENS = int(os.getenv("LLM_BATCH_TOKENS", "0"))
+
+# LangGraph checkpoints (after every node) and the per-item run journal share this database.
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", os.path.join(".cache", "checkpoints.sqlite"))
+run_journal = RunJournal(CHECKPOINT_DB)
+
+# Queryable index of generated items, scripts and documents across runs (also used by the sidebar).
+ARTIFACT_DB = os.getenv("ARTIFACT_DB", os.path.join(".cache", "artifacts.sqlite"))
+artifact_store = ArtifactStore(ARTIFACT_DB)
+
+# -------------------------------
+# Folders (overridable per run, e.g. by the headless CLI)
+# -------------------------------
+INPUT_REQ_DOCS_FOLDER = os.getenv("INPUT_REQ_DOCS_FOLDER", "requirement_docs")
+GEN_SCRIPT_FOLDER = os.getenv("GEN_SCRIPT_FOLDER", "GEN-TESTSCRIPTS")
+OUTPUT_FOLDER = os.getenv("OUTPUT_FOLDER", "generated_outputs")
+DOCUMENT_NAME="GenAI_Features_UserStories_Tescases.docx"
+GENERATION_MANIFEST="generation_manifest.json"
+LAST_RUN_FILE="last_run.json"
+
+
+def configure_folders(input_folder: str = None, script_folder: str = None, output_folder: str = None) -> None:
+    global INPUT_REQ_DOCS_FOLDER, GEN_SCRIPT_FOLDER, OUTPUT_FOLDER
+    INPUT_REQ_DOCS_FOLDER = input_folder or INPUT_REQ_DOCS_FOLDER
+    GEN_SCRIPT_FOLDER = script_folder or GEN_SCRIPT_FOLDER
+    OUTPUT_FOLDER = output_folder or OUTPUT_FOLDER
+    os.makedirs(GEN_SCRIPT_FOLDER, exist_ok=True)
+    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+    os.makedirs(INPUT_REQ_DOCS_FOLDER, exist_ok=True)
+
+
+# Streamlit job view: seconds between polls and number of log lines shown.
+UI_REFRESH_SECONDS = float(os.getenv("UI_REFRESH_SECONDS", "2"))
+UI_LOG_LINES = int(os.getenv("UI_LOG_LINES", "15"))
+SIDEBAR_PAGE_SIZE = int(os.getenv("SIDEBAR_PAGE_SIZE", "25"))
+DOWNLOAD_CACHE_FOLDER = os.path.join(".cache", "downloads")
+
+# Optional Prometheus text endpoint for the process-wide metrics (e.g. METRICS_PORT=9464).
+if os.getenv("METRICS_PORT"):
+    metrics.start_prometheus_server(int(os.getenv("METRICS_PORT")))
+
+# Generate only test bodies against a shared page-object library (pages.py + conftest.py)
+# kept in GEN_SCRIPT_FOLDER instead of a standalone script per test case.
+PAGE_OBJECT_MODE = os.getenv("PAGE_OBJECT_MODE", "0") == "1"
+
+# Test cases at least this similar (word-shingle Jaccard) share one generated script; 0 disables.
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.9"))
+
+# Log lines about generated items name at most this many ids instead of dumping the items.
+LOG_SUMMARY_ITEMS = int(os.getenv("LOG_SUMMARY_ITEMS", "5"))
+
+# Read JSON list answers through llm.stream() and hand items downstream as they complete.
+LLM_STREAMING = os.getenv("LLM_STREAMING", "1") == "1"
+
+# Rate limits of the Azure deployment (0 = unlimited), and how often a retryable LLM error is
+# retried. The scheduler is shared by every Streamlit session and run of this process; other
+# processes (each `cli run`, each project of `cli batch`) enforce their own limits.
+llm_scheduler = get_scheduler(float(os.getenv("AZURE_OPENAI_RPM", "0")), float(os.getenv("AZURE_OPENAI_TPM", "0")))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "6"))
+# Extra attempts for an item whose generation failed for another reason (e.g. malformed JSON).
+ITEM_RETRIES = int(os.getenv("ITEM_RETRIES", "1"))
+
+# Optional semaphore shared by every process of a batch run (see cli.py batch), capping
+# the LLM calls in flight across all projects; None leaves only LLM_MAX_CONCURRENCY.
+llm_slots = None
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+llm_cache = LLMCache(
+    os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite"),
+    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000")),
+    max_bytes=int(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024,
+    max_age_seconds=int(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30")) * 24 * 3600,
 )
 
 
+def plan_llm_call(prompt: Prompt, profile_name: str):
+    # Picks the profile's deployment and an output budget sized to the item data in the prompt
+    # (the static system prefix does not grow the answer). The cache key covers the profile
+    # settings but not the budget, which only caps the answer length.
+    profile = llm_profiles.get(profile_name) or llm_profiles["default"]
+    budget = profile.output_budget(prompt.user)
+    deployment = profile.deployment_for(budget)
+    key = LLMCache.make_key(prompt.messages(), profile=profile.name, deployment=deployment,
+                            temperature=profile.temperature, top_p=profile.top_p)
+    metrics.observe("llm_output_budget_tokens", budget, stage=metrics.current_stage.get())
+    # Provider prompt caching only applies to a shared prefix of at least 1024 tokens.
+    metrics.observe("llm_static_prefix_tokens", prompt.prefix_tokens, stage=metrics.current_stage.get())
+    metrics.inc("llm_calls_by_deployment_total", deployment=deployment or "default")
+    return profile, budget, deployment, key
+
+
+def cached_llm_answer(key: str, parse=None):
+    # Returns (True, parsed answer) on a usable cache hit. A cached answer that no longer
+    # parses is dropped so it is fetched again.
+    stage = metrics.current_stage.get()
+    if not LLM_CACHE_ENABLED:
+        return False, None
+    content = llm_cache.get(key)
+    if content is not None:
+        try:
+            result = parse(content) if parse else content
+            metrics.inc("llm_cache_hits_total", stage=stage)
+            return True, result
+        except Exception:
+            llm_cache.invalidate(key)
+    metrics.inc("llm_cache_misses_total", stage=stage)
+    return False, None
+
+
+def is_truncated(response) -> bool:
+    return (getattr(response, "response_metadata", None) or {}).get("finish_reason") == "length"
+
+
+def invoke_llm(prompt: Prompt, parse=None, profile: str = "default"):
+    # All node prompts go through here so identical prompts on unchanged documents are
+    # answered from the on-disk cache, and only answers that parse are ever stored. An
+    # answer cut off by its output budget is requested once more with the profile maximum.
+    plan = plan_llm_call(prompt, profile)
+    hit, result = cached_llm_answer(plan[3], parse)
+    if hit:
+        return result
+    return fetch_llm_answer(prompt, parse, plan)
+
+
+def fetch_llm_answer(prompt: Prompt, parse, plan):
+    # Cache miss path of invoke_llm for a call already planned by plan_llm_call.
+    profile, budget, deployment, key = plan
+    stage = metrics.current_stage.get()
+    response = call_llm(get_llm(profile, deployment), prompt, budget)
+    if is_truncated(response) and budget < profile.max_tokens:
+        metrics.inc("llm_budget_retries_total", stage=stage)
+        response = call_llm(get_llm(profile), prompt, profile.max_tokens)
+    content = response.content
+    result = parse(content) if parse else content
+    if LLM_CACHE_ENABLED and not is_truncated(response):
+        llm_cache.put(key, content)
+    return result
+
+
+def call_llm(client, prompt: Prompt, max_tokens: int):
+    return with_llm_retries(lambda: invoke_once(client, prompt, max_tokens), estimate_tokens(prompt.text) + max_tokens)
+
+
+def invoke_once(client, prompt: Prompt, max_tokens: int):
+    stage = metrics.current_stage.get()
+    start = time.time()
+    try:
+        if llm_slots is not None:
+            with llm_slots:
+                metrics.observe("llm_slot_wait_seconds", time.time() - start, stage=stage)
+                start = time.time()
+                response = client.invoke(prompt.messages(), max_tokens=max_tokens)
+        else:
+            response = client.invoke(prompt.messages(), max_tokens=max_tokens)
+    except Exception:
+        metrics.inc("llm_errors_total", stage=stage)
+        raise
+    record_llm_call(stage, time.time() - start, response)
+    return response
+
+
+def with_llm_retries(call, reserve_tokens: int):
+    # Every attempt first takes its request and token share (prompt plus output budget, as
+    # Azure counts it) from the shared scheduler. Rate limits, timeouts and 5xx errors are
+    # retried; a 429 pauses all callers for the server's Retry-After.
+    stage = metrics.current_stage.get()
+    for attempt in itertools.count(1):
+        waited = llm_scheduler.acquire(reserve_tokens, current_priority.get())
+        if waited > 0.001:
+            metrics.observe("llm_rate_limit_wait_seconds", waited, stage=stage)
+        try:
+            return call()
+        except Exception as e:
+            if attempt > LLM_MAX_RETRIES or not is_retryable(e):
+                raise
+            delay = retry_delay(e, attempt)
+            metrics.inc("llm_retries_total", stage=stage)
+            logger.warning(f"LLM call failed on attempt {attempt}. Retrying in {delay:.1f}s. {e}")
+            if is_rate_limited(e):
+                llm_scheduler.pause(delay)
+            else:
+                time.sleep(delay)
+
+
+def stream_llm_items(prompt: Prompt, on_item=None, profile: str = "default") -> List[Any]:
+    # Like invoke_llm(prompt, parse=json.loads) for prompts answering with a JSON list, but
+    # reads llm.stream() and hands each list element to on_item as soon as it is complete,
+    # so downstream work starts before the rest of the response has been generated.
+    plan = plan_llm_call(prompt, profile)
+    profile, budget, deployment, key = plan
+    hit, items = cached_llm_answer(key, parse_json_array)
+    if not hit:
+        client = get_llm(profile, deployment)
+        if LLM_STREAMING and hasattr(client, "stream"):
+            return stream_llm_answer(client, prompt, on_item, plan)
+        items = fetch_llm_answer(prompt, parse_json_array, plan)
+    for item in items if on_item else ():
+        on_item(item)
+    return items
+
+
+def stream_llm_answer(client, prompt: Prompt, on_item, plan) -> List[Any]:
+    profile, budget, deployment, key = plan
+
+    handed_on = []
+
+    def forward(item):
+        handed_on.append(item)
+        on_item(item)
+
+    # Retried attempts skip the items already handed downstream.
+    reserve = estimate_tokens(prompt.text) + budget
+    content, items, truncated = with_llm_retries(
+        lambda: stream_llm(client, prompt, budget, forward if on_item else None, skip=len(handed_on)), reserve)
+    if truncated and budget < profile.max_tokens:
+        # Cut off by the output budget: ask again with the profile maximum.
+        metrics.inc("llm_budget_retries_total", stage=metrics.current_stage.get())
+        reserve = estimate_tokens(prompt.text) + profile.max_tokens
+        content, items, truncated = with_llm_retries(
+            lambda: stream_llm(get_llm(profile), prompt, profile.max_tokens, forward if on_item else None,
+                               skip=len(handed_on)), reserve)
+    if truncated:
+        metrics.inc("llm_errors_total", stage=metrics.current_stage.get())
+        raise ValueError(f"Answer exceeded {profile.max_tokens} output tokens")
+    if LLM_CACHE_ENABLED:
+        llm_cache.put(key, content)
+    return items
+
+
+def stream_llm(client, prompt: Prompt, max_tokens: int, on_item=None, skip: int = 0):
+    stage = metrics.current_stage.get()
+    parser = JsonArrayStream()
+    pieces, usage, finish_reason = [], None, None
+    start = time.time()
+    first_token_at = first_item_at = None
+    emitted = 0
+    try:
+        with (llm_slots if llm_slots is not None else contextlib.nullcontext()):
+            for chunk in client.stream(prompt.messages(), max_tokens=max_tokens):
+                if first_token_at is None and chunk.content:
+                    first_token_at = time.time()
+                    metrics.observe("llm_first_token_seconds", first_token_at - start, stage=stage)
+                pieces.append(chunk.content)
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                finish_reason = (getattr(chunk, "response_metadata", None) or {}).get("finish_reason") or finish_reason
+                for item in parser.feed(chunk.content):
+                    if first_item_at is None:
+                        first_item_at = time.time()
+                        metrics.observe("llm_first_item_seconds", first_item_at - start, stage=stage)
+                    emitted += 1
+                    if on_item and emitted > skip:
+                        on_item(item)
+    except Exception:
+        metrics.inc("llm_errors_total", stage=stage)
+        raise
+    content = "".join(pieces)
+    record_llm_call(stage, time.time() - start, SimpleNamespace(content=content, usage_metadata=usage))
+    if finish_reason == "length":
+        return content, None, True
+    try:
+        items = parser.close()
+    except ValueError:
+        metrics.inc("llm_errors_total", stage=stage)
+        raise
+    return content, items, False
+
+
+def record_llm_call(stage: str, duration: float, response) -> None:
+    metrics.observe("llm_call_latency_seconds", duration, stage=stage)
+    metrics.inc("llm_calls_total", stage=stage)
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage:
+        prompt_tokens, completion_tokens = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+        cached_tokens = (usage.get("input_token_details") or {}).get("cache_read", 0)
+    else:
+        token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+        prompt_tokens, completion_tokens = token_usage.get("prompt_tokens", 0), token_usage.get("completion_tokens", 0)
+        cached_tokens = (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+    metrics.inc("llm_prompt_tokens_total", prompt_tokens, stage=stage)
+    metrics.inc("llm_completion_tokens_total", completion_tokens, stage=stage)
+    # Prompt tokens served from the provider's prompt cache (billed at a discount, faster first token).
+    metrics.inc("llm_cached_prompt_tokens_total", cached_tokens or 0, stage=stage)
 
 
 # -------------------------------
 # 4. Nodes
 # -------------------------------
+def extract_features(docs_text: str, on_item=None) -> List[Dict[str, Any]]:
+    prompt = prompts.FEATURES.render(documents=docs_text)
+    return stream_llm_items(prompt, on_item, profile="features")
+
+
 @telemetry("Feature Analyzer Node")
 def feature_analyzer_node(state: AgentState) -> AgentState:
     docs_text = "\n\n".join(state["requirement_docs"])
-    prompt = f"""
-    Extract features from the following requirement documents. Reference Output JSON list:
-    [{{"id": "F-xxx", "title": "...", "description": "..."}}]
-
-    Documents:
-    {docs_text}
-
-    Do not include ```json
-    """
 
     try:
-        response = llm.invoke(prompt)   
-        features = json.loads(response.content)
-        logger.info(f"Extracted {len(features)} features from doc.")
-        logger.info(f"Extracted Features => {features}")
-        state["features"] = response.content
+        store = open_store(state, "requirement_docs")
+        reused = store.lookup(docs_text) if store is not None else None
+        lost_chunks = []
+        if reused is not None:
+            features = reused
+            logger.info(f"Requirement docs already analysed. Reusing {len(features)} features.")
+        elif estimate_tokens(docs_text) > FEATURE_CHUNK_TOKENS:
+            # Map-reduce: extract from token-bounded chunks in parallel, then merge and renumber.
+            chunks = split_by_token_budget(docs_text, FEATURE_CHUNK_TOKENS)
+            logger.info(f"Requirement docs exceed {FEATURE_CHUNK_TOKENS} tokens. Extracting features from {len(chunks)} chunks.")
+            chunk_features = run_concurrently(extract_features, chunks)
+            lost_chunks = [index for index, result in enumerate(chunk_features) if result is None]
+            if lost_chunks:
+                # Partial features are used for this run only, so a resumed or incremental run
+                # extracts the documents again instead of reusing the incomplete list.
+                logger.warning(f"Could not extract features from chunks {lost_chunks} of {len(chunks)}. "
+                               f"Not recording the partial feature list.")
+            features = merge_features(chunk_features)
+        else:
+            features = extract_features(docs_text)
+        if store is not None:
+            if reused is None and not lost_chunks:
+                store.record(docs_text, features)
+            close_store(state, store)
+        state["features"] = to_records(Feature, features)
+        record_artifacts(artifact_store.put_items, state["run_id"], FEATURE, state["features"])
+        logger.info(f"Extracted features => {summarize(state['features'], LOG_SUMMARY_ITEMS)}")
         return state
     except json.JSONDecodeError as e:
-        logger.warning(f"Could not parse features JSON. Skipping. {e}")
+        logger.warning(f"Could not parse features JSON. Stopping the run so it can be resumed. {e}")
+        raise
     except Exception as e:
-        logger.warning(f"Could not parse features JSON. Skipping. {e}")
+        logger.warning(f"Could not parse features JSON. Stopping the run so it can be resumed. {e}")
+        raise
+
+# -------------------------------
+# 4a. Per-item generation helpers
+# -------------------------------
+def _run_item(func, item, submitted_at: float = None, stage: str = None):
+    stage = stage or metrics.current_stage.get()
+    with metrics.stage(stage):
+        if submitted_at is not None:
+            metrics.observe("queue_wait_seconds", time.time() - submitted_at, stage=stage)
+        item_id = getattr(item, "id", item)
+        try:
+            for attempt in range(ITEM_RETRIES + 1):
+                try:
+                    return func(item)
+                except Exception as e:
+                    if attempt < ITEM_RETRIES:
+                        metrics.inc("item_retries_total", stage=stage)
+                        logger.warning(f"Could not process item {item_id}. Retrying. {e}")
+                        continue
+                    logger.warning(f"Could not process item {item_id}. Skipping. {e}")
+                    return None
+        finally:
+            jobs.report_done(stage)
+
+
+def run_concurrently(func, items, max_workers: int = None) -> List[Any]:
+    # Fans func out over items with at most max_workers LLM calls in flight.
+    # Results keep the input order; a failed item yields None instead of aborting the batch.
+    items = list(items)
+    max_workers = max_workers or LLM_MAX_CONCURRENCY
+    if items:
+        jobs.report_total(metrics.current_stage.get(), len(items))
+    if max_workers <= 1 or len(items) <= 1:
+        return [_run_item(func, item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix="llm-worker") as executor:
+        futures = [submit_item(executor, func, item) for item in items]
+        return [future.result() for future in futures]
+
+
+def submit_item(executor: ThreadPoolExecutor, func, item, stage: str = None):
+    # Workers run in a copy of the caller's context so stage labels, run metrics and job
+    # progress follow the item.
+    return executor.submit(contextvars.copy_context().run, _run_item, func, item, time.time(), stage)
+
+
+def open_store(state: AgentState, stage: str) -> StageStore:
+    # Resume: items already completed in this run come from the run journal.
+    # Incremental mode: outputs whose input fingerprint matches the previous run are reused.
+    journal = run_journal.stage(state["run_id"], stage) if state.get("run_id") else None
+    manifest = GenerationManifest(os.path.join(OUTPUT_FOLDER, GENERATION_MANIFEST), stage) if state.get("incremental") else None
+    if journal is None and manifest is None:
+        return None
+    return StageStore(stage, manifest, journal)
+
+
+def close_store(state: AgentState, store: StageStore) -> None:
+    if store is None:
+        return
+    if store.manifest is not None:
+        store.manifest.save()
+        state.setdefault("reused", {})[store.stage] = store.manifest.reused
+    if store.journal is not None:
+        state.setdefault("resumed", {})[store.stage] = store.resumed
+
+
+def to_records(record_type, items: List[Any]) -> List[Any]:
+    # LLM output to records; an entry that is not a JSON object is dropped, not the whole answer.
+    result = []
+    for item in items or []:
+        try:
+            result.append(record_type.from_dict(item))
+        except ValueError as e:
+            logger.warning(f"Could not read {record_type.__name__} item. Skipping. {e}")
+    return result
+
+
+def _emit_record(record_type, on_item, item) -> None:
+    # Streamed items reach the pipeline as records; malformed ones are reported by to_records.
+    try:
+        record = record_type.from_dict(item)
+    except ValueError:
+        return
+    on_item(record)
+
+
+def generate_user_stories(feature: Feature, store: StageStore = None, on_item=None) -> List[UserStory]:
+    if store is not None:
+        user_stories = store.lookup(feature)
+        if user_stories is not None:
+            logger.info(f"Feature {feature.id} already generated. Reusing {len(user_stories)} user stories.")
+            return coerce(UserStory, user_stories)
+
+    logger.info(f"Processing feature = {feature.id}")
+    prompt = prompts.USER_STORIES.render(feature=feature.to_prompt())
+    if on_item is not None:
+        on_item = partial(_emit_record, UserStory, on_item)
+    user_stories = to_records(UserStory, stream_llm_items(prompt, on_item, profile="user_stories"))
+    logger.info(f"Extracted user stories for {feature.id} => {summarize(user_stories, LOG_SUMMARY_ITEMS)}")
+    if store is not None:
+        store.record(feature, user_stories)
+    return user_stories
+
+
+def generate_test_cases(user_story: UserStory, store: StageStore = None, on_item=None) -> List[TestCase]:
+    if store is not None:
+        test_cases = store.lookup(user_story)
+        if test_cases is not None:
+            logger.info(f"User story {user_story.id} already generated. Reusing {len(test_cases)} test cases.")
+            return coerce(TestCase, test_cases)
+
+    prompt = prompts.TEST_CASES.render(user_story=user_story.to_prompt())
+    if on_item is not None:
+        on_item = partial(_emit_record, TestCase, on_item)
+    test_cases = to_records(TestCase, stream_llm_items(prompt, on_item, profile="test_cases"))
+    logger.info(f"Extracted test cases for {user_story.id} => {summarize(test_cases, LOG_SUMMARY_ITEMS)}")
+    if store is not None:
+        store.record(user_story, test_cases)
+    return test_cases
+
+
+def generate_selenium_script(tc: TestCase, store: StageStore = None) -> str:
+    if store is not None:
+        filename = store.lookup(tc, is_valid=lambda name: os.path.exists(os.path.join(GEN_SCRIPT_FOLDER, name)))
+        if filename is not None:
+            logger.info(f"Test case {tc.id} already generated. Reusing {filename}.")
+            return os.path.join(GEN_SCRIPT_FOLDER, filename)
+
+    if PAGE_OBJECT_MODE:
+        script = generate_page_object_test(tc)
+    else:
+        prompt = prompts.SELENIUM_SCRIPT.render(test_case=tc.to_prompt(), filename=f"GEN-{tc.id}.py")
+        script = invoke_llm(prompt, profile="scripts")
+    filename = f"GEN-{tc.id}.py"
+    filepath = os.path.join(GEN_SCRIPT_FOLDER, filename)
+    with open(filepath, "w", encoding="utf-8") as f:
+        f.write(script)
+    metrics.inc("bytes_written_total", len(script.encode("utf-8")), stage=metrics.current_stage.get())
+    logger.info(f"Extracted {filename} test scripts from doc.")
+    if store is not None:
+        store.record(tc, filename)
+    return filepath
+
+
+def generate_page_object_test(tc: TestCase) -> str:
+    # Only the test body (plus any missing page classes or methods) is generated; the
+    # driver fixture and shared page objects live in GEN_SCRIPT_FOLDER.
+    page_objects.ensure_library(GEN_SCRIPT_FOLDER)
+    # The library listing only changes when page classes are merged, so it leads the user message.
+    prompt = prompts.PAGE_OBJECT_TEST.render(library=page_objects.library_interface(GEN_SCRIPT_FOLDER),
+                                             test_name=f"test_{tc.id.replace('-', '_').lower()}",
+                                             test_case=tc.to_prompt())
+    source = page_objects.strip_code_fences(invoke_llm(prompt, profile="test_bodies"))
+    try:
+        script, merged = page_objects.merge_page_classes(GEN_SCRIPT_FOLDER, source)
+    except SyntaxError as e:
+        logger.warning(f"Generated test for {tc.id} does not parse. Keeping it for validation. {e}")
+        return source
+    if merged:
+        logger.info(f"Merged page classes {merged} into {page_objects.PAGES_MODULE}.")
+    return script
+
+
+# -------------------------------
+# 4b. Batched generation (several stories / test cases per LLM call)
+# -------------------------------
+def build_user_story_batch_prompt(features: List[Feature]) -> Prompt:
+    return prompts.USER_STORIES_BATCH.render(features="\n".join(feature.to_prompt() for feature in features))
+
+
+def build_test_case_batch_prompt(user_stories: List[UserStory]) -> Prompt:
+    return prompts.TEST_CASES_BATCH.render(
+        user_stories="\n".join(user_story.to_prompt() for user_story in user_stories))
+
+
+def _parse_keyed_json(content: str) -> Dict[str, Any]:
+    keyed = json.loads(content)
+    if not isinstance(keyed, dict):
+        raise ValueError("Expected a JSON object keyed by item id")
+    return keyed
+
+
+def batch_item_records(record_type, output: Any) -> Optional[List[Any]]:
+    # One item's answer in a batch response as records, or None unless it is a list of JSON
+    # objects; such items go back through the single-item path instead of into the state.
+    if not isinstance(output, list):
+        return None
+    try:
+        return [record_type.from_dict(entry) for entry in output]
+    except ValueError:
+        return None
+
+
+def generate_in_batches(items: List[Any], generate_one, build_batch_prompt, record_type,
+                        store: StageStore = None, profile: str = "default") -> List[Any]:
+    # Packs items into prompts of up to LLM_BATCH_TOKENS input tokens and splits the keyed
+    # response back per item. Items missing or malformed in a response are retried one by one.
+    results: List[Any] = [None] * len(items)
+    pending = []
+    for index, item in enumerate(items):
+        reused = store.lookup(item) if store is not None else None
+        if reused is not None:
+            results[index] = reused
+        else:
+            pending.append(index)
+
+    def run_batch(batch: List[int]) -> Dict[int, Any]:
+        keyed = invoke_llm(build_batch_prompt([items[index] for index in batch]), parse=_parse_keyed_json, profile=profile)
+        outputs, malformed = {}, []
+        for index in batch:
+            item_id = str(items[index].id)
+            if item_id not in keyed:
+                continue
+            output = batch_item_records(record_type, keyed[item_id])
+            if output is None:
+                malformed.append(items[index])
+                continue
+            outputs[index] = output
+            if store is not None:
+                store.record(items[index], output)
+        if malformed:
+            logger.warning(f"Batch answer for {summarize(malformed, LOG_SUMMARY_ITEMS)} is not a list of "
+                           f"{record_type.__name__} objects. Retrying them individually.")
+        return outputs
+
+    batches = pack_by_token_budget(pending, LLM_BATCH_TOKENS, lambda index: estimate_tokens(items[index].to_prompt()))
+    for outputs in run_concurrently(run_batch, batches):
+        for index, output in (outputs or {}).items():
+            results[index] = output
+
+    retry = [index for index in pending if results[index] is None]
+    logger.info(f"Batched {len(pending)} items into {len(batches)} LLM calls; retrying {len(retry)} items individually.")
+    for index, output in zip(retry, run_concurrently(partial(generate_one, store=store), [items[index] for index in retry])):
+        results[index] = output
+    return results
+
+
+def generate_for_items(items: List[Any], generate_one, build_batch_prompt, record_type,
+                       store: StageStore = None, profile: str = "default") -> List[Any]:
+    if LLM_BATCH_TOKENS > 0 and len(items) > 1:
+        return generate_in_batches(items, generate_one, build_batch_prompt, record_type, store, profile)
+    return run_concurrently(partial(generate_one, store=store), items)
+
 
 @telemetry("User Story Node")
 def user_story_node(state: AgentState) -> AgentState:
 
     try:
-        all_user_stories = []
-        json_feature=json.loads(state['features'])
-        for feature in json_feature:
-            
-            print (f"processing feature = {feature['id']} , {feature}")
-            prompt = f"""
-            Generate user stories for these features (each feature can have multiple user stories). Reference Output JSON list:
-            [{{"id": "F-xxx_US-xxx", "feature_id": "F-xxx", "story": "As a ..."}}]
-
-            Features:
-            {feature}
-
-            Do not include ```json
-            """
-            response = llm.invoke(prompt)
-            user_stories=json.loads(response.content)
-            all_user_stories.extend(user_stories)
-            logger.info(f"Extracted User Stories => {user_stories} user stories from doc.")
-            #logger.info(f"Extracted {feature['id']} = {user_stories['id']} user stories from doc.")
+        features = coerce(Feature, state["features"])
+        store = open_store(state, "features")
+        results = generate_for_items(features, generate_user_stories, build_user_story_batch_prompt, UserStory,
+                                     store, profile="user_stories")
+        all_user_stories = to_records(UserStory, [story for stories in results if stories for story in stories])
         state["user_stories"] = all_user_stories
-        logger.info(f"Total Extracted {len(state["user_stories"])} user stories from doc.")
-        logger.info(f"Total Extracted User Stories => {state["user_stories"]}")
+        record_artifacts(artifact_store.put_items, state["run_id"], USER_STORY, all_user_stories)
+        close_store(state, store)
+        logger.info(f"Total Extracted {len(all_user_stories)} user stories from doc ({results.count(None)} features failed).")
+        logger.info(f"Total extracted user stories => {summarize(all_user_stories, LOG_SUMMARY_ITEMS)}")
         return state
     except json.JSONDecodeError as e:
-        logger.warning(f"Could not parse user stories JSON. Skipping. {e}")
+        logger.warning(f"Could not parse user stories JSON. Stopping the run so it can be resumed. {e}")
+        raise
     except Exception as e:
-        logger.warning(f"Could not parse user stories JSON. Skipping. {e.with_traceback}")
+        logger.warning(f"Could not parse user stories JSON. Stopping the run so it can be resumed. {e}")
+        raise
 
 
 @telemetry("Test Case Node")
 def test_case_node(state: AgentState) -> AgentState:
     try:
-        all_test_cases = []
-        #json_user_story=json.loads(state['user_stories'])
-        for user_story in state['user_stories']:
-
-            prompt = f"""
-            Generate test cases for these user stories (each user stories can have multiple test cases). Reference output JSON list:
-            [{{"id": "US-xxx_TC-xxx", "user_story_id": "US-xxx", "steps": ["step1", "step2"], "expected_result": "..."}}]
-
-            User Stories:
-            {user_story}
-
-            Generate all the test cases 
-            Do not include ```json
-            """          
-            response = llm.invoke(prompt)
-            test_cases=json.loads(response.content)
-            all_test_cases.extend(test_cases)
-            logger.info(f"Extracted Test Cases => {test_cases}")
+        store = open_store(state, "user_stories")
+        results = generate_for_items(coerce(UserStory, state["user_stories"]), generate_test_cases,
+                                     build_test_case_batch_prompt, TestCase, store, profile="test_cases")
+        all_test_cases = to_records(TestCase, [tc for test_cases in results if test_cases for tc in test_cases])
         state["test_cases"] = all_test_cases
-        logger.info(f"Extracted {len(state["test_cases"])} test cases from doc.")
-        logger.info(f"Total Extracted Test Cases => {state["test_cases"]}")
+        record_artifacts(artifact_store.put_items, state["run_id"], TEST_CASE, all_test_cases, story_features(state))
+        close_store(state, store)
+        logger.info(f"Extracted {len(all_test_cases)} test cases from doc ({results.count(None)} user stories failed).")
+        logger.info(f"Total extracted test cases => {summarize(all_test_cases, LOG_SUMMARY_ITEMS)}")
         return state
-    except json.JSONDecodeError as e:
-        logger.warning(f"Could not parse test cases JSON. Skipping. {e.with_traceback()}")
     except Exception as e:
-        logger.warning(f"Could not parse test cases JSON. Skipping. {e.with_traceback()}")
+        logger.warning(f"Could not parse test cases JSON. Stopping the run so it can be resumed. {e}")
+        raise
 
 
 @telemetry("Test Script Node")
 def selenium_script_node(state: AgentState) -> AgentState:
-    scripts = {}
     try:
-        #json_tc = json.loads(state["test_cases"])
-        #print(json_tc)
-        for tc in state["test_cases"]:
-            #print (tc)
-            #itc = json.loads(tc)
-            prompt = f"""
-            Generate a Selenium Python script for this test case and provide full code:
-
-            {tc}
-
-            Filename: GEN-{tc['id']}.py
-
-            Mandatory: 
-            - Use best practices and standards
-            - Remove comments, notes, summaries, headers, trailers and ```python
-            """
-
-            
-            response = llm.invoke(prompt)
-            filename = f"GEN-{tc['id']}.py"
-            filepath = os.path.join(GEN_SCRIPT_FOLDER, filename)
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(response.content)
-            scripts[tc["id"]] = filepath
-
-            logger.info(f"Extracted {filename} test scripts from doc.")
-        state["selenium_scripts"] = scripts
-        logger.info(f"Total test scripts generated: {len(state["selenium_scripts"])}")
+        test_cases = coerce(TestCase, state["test_cases"])
+        store = open_store(state, "test_cases")
+        if DEDUP_THRESHOLD > 0:
+            # Near-duplicate test cases (e.g. the same login test under several stories) share one script.
+            representatives, duplicates = cluster_items(test_cases, DEDUP_THRESHOLD)
+        else:
+            representatives, duplicates = test_cases, {}
+        results = run_concurrently(partial(generate_selenium_script, store=store), representatives)
+        generated = {tc.id: filepath for tc, filepath in zip(representatives, results) if filepath}
+        scripts = {tc.id: generated.get(duplicates.get(tc.id, tc.id)) for tc in test_cases}
+        state["selenium_scripts"] = {tc_id: filepath for tc_id, filepath in scripts.items() if filepath}
+        state["duplicates"] = duplicates
+        record_scripts(state)
+        close_store(state, store)
+        report_duplicates(len(test_cases), len(representatives), len(duplicates))
+        logger.info(f"Total test scripts generated: {len(generated)} ({results.count(None)} test cases failed)")
+        return state
+    except Exception as e:
+        logger.warning(f"Could not generate test scripts. Stopping the run so it can be resumed. {e}")
+        raise
+
+
+def record_artifacts(write, *args) -> None:
+    # The artifact store only indexes what the run produced; failing to update it never fails the run.
+    try:
+        write(*args)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Could not update the artifact store {ARTIFACT_DB}. Skipping. {e}")
+
+
+def story_features(state: AgentState) -> Dict[str, str]:
+    return {story.id: story.parent_id for story in RecordIndex(coerce(UserStory, state.get("user_stories")))}
+
+
+def record_scripts(state: AgentState) -> None:
+    scripts = state.get("selenium_scripts") or {}
+    paths = list(scripts.values())
+    if PAGE_OBJECT_MODE:
+        paths += [os.path.join(GEN_SCRIPT_FOLDER, name) for name in (page_objects.PAGES_MODULE, page_objects.CONFTEST_MODULE)]
+    record_artifacts(artifact_store.set_scripts, state["run_id"], scripts)
+    record_artifacts(artifact_store.put_files, "scripts", paths, state["run_id"])
+
+
+def report_duplicates(total: int, clusters: int, duplicates: int) -> None:
+    if not duplicates:
+        return
+    metrics.inc("dedup_llm_calls_saved_total", duplicates, stage=metrics.current_stage.get())
+    logger.info(f"Deduplicated {total} test cases into {clusters} clusters; saved {duplicates} script generation calls.")
+
+
+
+# -------------------------------
+# 4c. Pipelined mode: each feature flows through stories, test cases and scripts on its own
+# -------------------------------
+@telemetry("Feature Pipeline Node")
+def feature_pipeline_node(state: AgentState) -> AgentState:
+    # Replaces the user_story -> test_case -> selenium_script stage barriers. Work items are
+    # scheduled deepest stage first with at most LLM_MAX_CONCURRENCY in flight, so scripts
+    # for the first feature are written while later features are still being analysed.
+    try:
+        features = coerce(Feature, state["features"])
+        stores = {stage: open_store(state, stage) for stage in ("features", "user_stories", "test_cases")}
+        generators = {
+            "features": partial(generate_user_stories, store=stores["features"]),
+            "user_stories": partial(generate_test_cases, store=stores["user_stories"]),
+            "test_cases": partial(generate_selenium_script, store=stores["test_cases"]),
+        }
+        # Work items keep the metric and progress labels of the stage nodes they stand in for.
+        labels = {"features": "User Story Node", "user_stories": "Test Case Node", "test_cases": "Test Script Node"}
+        depth = {"features": 0, "user_stories": 1, "test_cases": 2}
+        outputs = {"user_stories": {}, "test_cases": {}, "selenium_scripts": {}}
+        failed = {stage: 0 for stage in depth}
+        ready, in_flight = [], {}
+        sequence = itertools.count()
+        # Workers post streamed child items and completions here; the scheduler is the only
+        # thread touching the heap and outputs.
+        events: "queue.Queue" = queue.Queue()
+        streamed: Dict[tuple, set] = {}
+        dedup_index = NearDuplicateIndex(DEDUP_THRESHOLD) if DEDUP_THRESHOLD > 0 else None
+        duplicates: Dict[tuple, tuple] = {}
+        # With dedup on, a feature's test cases wait until the feature has no story or test case
+        # generation left, and features are clustered in order, each in key order. The index then
+        # sees the same sequence as cluster_items in staged mode, whatever order threads finish in.
+        pending = [0] * len(features)
+        held: Dict[int, list] = {}
+        next_feature = [0]
+
+        def enqueue(stage, key, item):
+            jobs.report_total(labels[stage], 1)
+            if stage != "test_cases":
+                pending[key[0]] += 1
+            heapq.heappush(ready, (-depth[stage], key, next(sequence), stage, item))
+
+        def cluster_completed_features():
+            while next_feature[0] < len(features) and pending[next_feature[0]] == 0:
+                for key, item in sorted(held.pop(next_feature[0], []), key=lambda held_item: held_item[0]):
+                    representative = dedup_index.add(item.id, item)
+                    if representative is None:
+                        enqueue("test_cases", key, item)
+                    else:
+                        duplicates[key] = (item.id, representative)
+                next_feature[0] += 1
+
+        def add_child(stage, key, item):
+            # Children are told apart by id, so items repeated by a retried or completed
+            # call are not scheduled twice.
+            seen = streamed.setdefault((stage, key), set())
+            child_id = item.id or fingerprint(item)
+            if child_id in seen:
+                return
+            index = len(seen)
+            seen.add(child_id)
+            if stage == "features":
+                outputs["user_stories"][key + (index,)] = item
+                enqueue("user_stories", key + (index,), item)
+            else:
+                outputs["test_cases"][key + (index,)] = item
+                if dedup_index is None:
+                    enqueue("test_cases", key + (index,), item)
+                else:
+                    held.setdefault(key[0], []).append((key + (index,), item))
+
+        def submit(executor, stage, key, item):
+            func = generators[stage]
+            if stage != "test_cases":
+                # Stories and test cases are scheduled as soon as their JSON object is streamed.
+                func = partial(func, on_item=lambda child: events.put(("item", stage, key, child)))
+            future = submit_item(executor, func, item, labels[stage])
+            in_flight[future] = (stage, key, item)
+            future.add_done_callback(lambda done: events.put(("done", done)))
+
+        for index, feature in enumerate(features):
+            enqueue("features", (index,), feature)
+
+        with ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="pipeline-worker") as executor:
+            while ready or in_flight:
+                while ready and len(in_flight) < LLM_MAX_CONCURRENCY:
+                    _, key, _, stage, item = heapq.heappop(ready)
+                    submit(executor, stage, key, item)
+                event = events.get()
+                if event[0] == "item":
+                    _, stage, key, child = event
+                    add_child(stage, key, child)
+                    continue
+                stage, key, item = in_flight.pop(event[1])
+                result = event[1].result()
+                if result is None:
+                    failed[stage] += 1
+                elif stage == "test_cases":
+                    outputs["selenium_scripts"][key] = (item.id, result)
+                else:
+                    # Reused or non-streamed results arrive only here.
+                    for child in result:
+                        add_child(stage, key, child)
+                if stage != "test_cases":
+                    pending[key[0]] -= 1
+                    if dedup_index is not None:
+                        cluster_completed_features()
+
+        state["user_stories"] = [outputs["user_stories"][key] for key in sorted(outputs["user_stories"])]
+        state["test_cases"] = [outputs["test_cases"][key] for key in sorted(outputs["test_cases"])]
+        generated = dict(outputs["selenium_scripts"].values())
+        for key, (tc_id, representative) in duplicates.items():
+            if representative in generated:
+                outputs["selenium_scripts"][key] = (tc_id, generated[representative])
+        state["selenium_scripts"] = dict(outputs["selenium_scripts"][key] for key in sorted(outputs["selenium_scripts"]))
+        state["duplicates"] = {tc_id: representative for tc_id, representative in duplicates.values()}
+        record_artifacts(artifact_store.put_items, state["run_id"], USER_STORY, state["user_stories"])
+        record_artifacts(artifact_store.put_items, state["run_id"], TEST_CASE, state["test_cases"], story_features(state))
+        record_scripts(state)
+        with metrics.stage(labels["test_cases"]):
+            report_duplicates(len(outputs["test_cases"]), len(outputs["test_cases"]) - len(duplicates), len(duplicates))
+        for store in stores.values():
+            close_store(state, store)
+        logger.info(f"Pipeline generated {len(state['user_stories'])} user stories, {len(state['test_cases'])} test cases "
+                    f"and {len(state['selenium_scripts'])} test scripts (failed items per stage: {failed}).")
         return state
     except Exception as e:
-        logger.warning(f"Could not generate test scripts. Skipping. {e.with_traceback()}")
+        logger.warning(f"Could not run feature pipeline. Stopping the run so it can be resumed. {e}")
+        raise
+
 
+def llm_review_script(item) -> str:
+    script_path, local_result = item
+    with open(script_path, "r", encoding="utf-8") as f:
+        script = f.read()
+    prompt = prompts.SCRIPT_REVIEW.render(warnings="\n".join(f"- {warning}" for warning in local_result["warnings"]),
+                                          script=script)
+    return invoke_llm(prompt, profile="review")
 
 
 @telemetry("Test Script Validation Node")
 def validation_node(state: AgentState) -> AgentState:
-    results = {}
     try:
-        for tc_id, script_path in state["selenium_scripts"].items():
-            with open(script_path, "r", encoding="utf-8") as f:
-                script = f.read()
-            prompt = f"""
-            Validate this Selenium script against best practices and standards. Output "Pass" or "Fail with issues".
-
-            {script}
-            """
-            response = llm.invoke(prompt)
-            results[tc_id] = response.content
-            
-            state["validation_results"] = results
-            logger.info(f"Validation complete for {script_path}")
+        scripts = state.get("selenium_scripts") or {}
+        # Deduplicated test cases share a script file, so each distinct file is checked once.
+        paths = list(dict.fromkeys(scripts.values()))
+        # Static AST checks decide most scripts locally; only ambiguous ones go to the LLM.
+        local_results = validate_files(paths)
+        by_path = {path: format_result(result) for path, result in zip(paths, local_results)}
+
+        ambiguous = [(path, result) for path, result in zip(paths, local_results) if result["status"] == AMBIGUOUS]
+        reviews = run_concurrently(llm_review_script, ambiguous)
+        for (path, _), review in zip(ambiguous, reviews):
+            if review:
+                by_path[path] = review
+        results = {tc_id: by_path[path] for tc_id, path in scripts.items()}
+
+        state["validation_results"] = results
+        record_artifacts(artifact_store.set_validation, state["run_id"], results)
+        passed = sum(1 for result in results.values() if result.strip().lower().startswith("pass"))
+        logger.info(f"Validation complete: {passed}/{len(results)} scripts passed, {len(ambiguous)} sent to LLM review.")
         return state
     except Exception as e:
-            logger.warning(f"Could not validation test scripts. Skipping. {script_path} Error: {e}")
+        logger.warning(f"Could not validation test scripts. Skipping. Error: {e}")
 
 @telemetry("Document Collation Node")
 def collation_node(state: AgentState) -> AgentState:
-       
-    raw_output_path = os.path.join(OUTPUT_FOLDER, GENAI_RAW_OUTPUT)
+    # Rendered from the state with python-docx; no LLM call, so the report is complete
+    # (features, stories, test cases, script links) and identical for identical state.
     output_path = os.path.join(OUTPUT_FOLDER, DOCUMENT_NAME)
     try:
-
-        prompt = f"""
-        You are a Business Analyst, please collate Features → User Stories → Test Cases.
-        
-        Features:
-        {state['features']}
-        
-        Mandatory to include the ids, description, all the steps, expected results.
-        """
-        
-        # prompt = f"""
-        # You are a Business Analyst, please collate Features → User Stories → Test Cases.
-        
-        # Features:
-        # {state['features']}
-        # User Stories:
-        # {state['user_stories']}
-        # Test Cases:
-        # {state['test_cases']}
-        
-        # Mandatory to include the ids, description, all the steps, expected results.
-        # """
-        response = llm.invoke(prompt)
-
-        with open(raw_output_path, "w", encoding="utf-8") as f:
-            f.write(response.content)
-
-        markdown_to_word(raw_output_path, output_path)
-
-        print(f"Successfully converted '{raw_output_path}' to '{output_path}'.")
-
-        # doc = DocxDocument()
-        # doc.add_heading("Requirement Analysis Report", 0)
-        # doc.add_paragraph(response.content)
-        
-        # doc.save(output_path)
+        counts = render_report(state, output_path)
+        metrics.inc("bytes_written_total", os.path.getsize(output_path), stage=metrics.current_stage.get())
         state["collated_docx"] = output_path
-        logger.info(f"Document collation complete for {output_path}")
+        record_artifacts(artifact_store.put_files, "documents", [output_path], state["run_id"])
+        logger.info(f"Document collation complete for {output_path} ({counts})")
         return state
     except Exception as e:
-        logger.warning(f"Could not collate all documents. Skipping. {e}")
+        logger.warning(f"Could not collate all documents. Stopping the run so it can be resumed. {e}")
+        raise
 
 
-def createLangraphApp():
+def createLangraphApp(pipelined: bool = None, checkpoint: bool = True):
 
     # -------------------------------
     # 5. Build Graph
     # -------------------------------
+    from langgraph.graph import StateGraph, END
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+    if pipelined is None:
+        pipelined = PIPELINED_MODE
     graph = StateGraph(AgentState)
     graph.add_node("feature_analyzer", feature_analyzer_node)
-    graph.add_node("user_story", user_story_node)
-    graph.add_node("test_case", test_case_node)
-    graph.add_node("selenium_script", selenium_script_node)
     graph.add_node("validation", validation_node)
     graph.add_node("collation", collation_node)
 
     graph.set_entry_point("feature_analyzer")
-    graph.add_edge("feature_analyzer", "user_story")
-    graph.add_edge("user_story", "test_case")
-    graph.add_edge("test_case", "selenium_script")
-    #graph.add_edge("selenium_script", "validation")
-    graph.add_edge("selenium_script", "collation")
+    if pipelined:
+        graph.add_node("feature_pipeline", feature_pipeline_node)
+        graph.add_edge("feature_analyzer", "feature_pipeline")
+        graph.add_edge("feature_pipeline", "validation")
+    else:
+        graph.add_node("user_story", user_story_node)
+        graph.add_node("test_case", test_case_node)
+        graph.add_node("selenium_script", selenium_script_node)
+        graph.add_edge("feature_analyzer", "user_story")
+        graph.add_edge("user_story", "test_case")
+        graph.add_edge("test_case", "selenium_script")
+        graph.add_edge("selenium_script", "validation")
+    graph.add_edge("validation", "collation")
     graph.add_edge("collation", END)
 
     # graph.set_entry_point("feature_analyzer")
@@ -379,16 +1078,117 @@ def createLangraphApp():
     # graph.add_edge("collation", END)
 
 
-    app = graph.compile()
+    # The records kept in the state are allowed explicitly; LangGraph blocks unregistered
+    # types in strict msgpack mode (LANGGRAPH_STRICT_MSGPACK=true) and warns about them otherwise.
+    checkpointer = SqliteSaver(sqlite3.connect(CHECKPOINT_DB, check_same_thread=False),
+                               serde=JsonPlusSerializer(allowed_msgpack_modules=CHECKPOINT_TYPES)) if checkpoint else None
+    app = graph.compile(checkpointer=checkpointer)
 
     return app
 
-def small_download_button(file_path, label):
-    with open(file_path, "rb") as f:
-        data = f.read()
-    b64 = base64.b64encode(data).decode()
-    href = f'<a href="data:file/txt;base64,{b64}" download="{os.path.basename(file_path)}" class="small-btn">⬇ {label}</a>'
-    st.markdown(href, unsafe_allow_html=True)
+
+def run_pipeline(app, docs: List[str], run_id: str = None, resume: bool = False, incremental: bool = False,
+                 priority: int = None) -> AgentState:
+    # A resumed run continues from the last checkpointed node; items that finished inside
+    # the interrupted node are replayed from the run journal instead of calling the LLM.
+    # priority (rate_limiter.INTERACTIVE / BATCH) orders this run's LLM calls in the scheduler.
+    run_id = run_id or uuid.uuid4().hex[:12]
+    config = {"configurable": {"thread_id": run_id}}
+    if resume:
+        snapshot = app.get_state(config)
+        if snapshot.next:
+            logger.info(f"Resuming run {run_id} at {list(snapshot.next)} (completed items: {run_journal.counts(run_id)})")
+            record_artifacts(artifact_store.start_run, run_id)
+            with metrics.run_metrics() as registry, rate_limiter.priority(priority):
+                final_state = app.invoke(None, config)
+            return finish_run(run_id, registry, final_state)
+        logger.info(f"Run {run_id} has no pending node. Re-running with completed items replayed from the journal.")
+
+    with open(os.path.join(OUTPUT_FOLDER, LAST_RUN_FILE), "w", encoding="utf-8") as f:
+        json.dump({"run_id": run_id, "started_at": time.time()}, f)
+    record_artifacts(artifact_store.start_run, run_id)
+    init_state: AgentState = {"requirement_docs": docs, "incremental": incremental, "run_id": run_id}
+    with metrics.run_metrics() as registry, rate_limiter.priority(priority):
+        final_state = app.invoke(init_state, config)
+    return finish_run(run_id, registry, final_state)
+
+
+def finish_run(run_id: str, registry: metrics.MetricsRegistry, final_state: AgentState) -> AgentState:
+    report_path = os.path.join(OUTPUT_FOLDER, f"run_report_{run_id}.json")
+    metrics.write_run_report(registry, report_path, run_id=run_id, llm_cache=llm_cache.stats())
+    logger.info(f"LLM cache stats => {llm_cache.stats()}")
+    record_artifacts(artifact_store.put_files, "documents", [report_path], run_id)
+    if final_state is not None:
+        final_state["run_report"] = report_path
+        record_artifacts(artifact_store.finish_run, run_id)
+    return final_state
+
+
+def last_run_id() -> str:
+    path = os.path.join(OUTPUT_FOLDER, LAST_RUN_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("run_id")
+
+def list_folder_page(folder: str, page: int, page_size: int):
+    # Listed from the artifact store, one indexed query per page; the folder itself is only
+    # scanned on an explicit refresh.
+    files, total = artifact_store.list_files(folder, page * page_size, page_size)
+    rows = [{
+        "name": row["name"],
+        "size (KB)": round(row["size"] / 1024, 1),
+        "modified": time.strftime("%Y-%m-%d %H:%M", time.localtime(row["modified"])),
+        "run": row["run_id"] or "",
+    } for row in files]
+    return rows, total
+
+
+def build_zip(folder: str, zip_path: str) -> str:
+    # Written to disk member by member, so the archive is never held in memory as a whole.
+    # An archive newer than every file in the folder is reused as is.
+    files = [entry for entry in os.scandir(folder) if entry.is_file()]
+    newest = max((entry.stat().st_mtime for entry in files), default=0)
+    if os.path.exists(zip_path) and os.path.getmtime(zip_path) >= newest:
+        return zip_path
+    os.makedirs(os.path.dirname(zip_path), exist_ok=True)
+    tmp_path = f"{zip_path}.tmp"
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for entry in sorted(files, key=lambda entry: entry.name):
+            archive.write(entry.path, arcname=entry.name)
+    os.replace(tmp_path, zip_path)
+    return zip_path
+
+
+def st_file_browser(folder: str, key: str):
+    _, total = list_folder_page(folder, 0, 0)
+    if not total:
+        # Nothing indexed yet (e.g. files from before the artifact store existed).
+        artifact_store.sync_folder(key, folder)
+        _, total = list_folder_page(folder, 0, 0)
+    pages = max(1, math.ceil(total / SIDEBAR_PAGE_SIZE))
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1, key=f"{key}_page") - 1
+    rows, total = list_folder_page(folder, page, SIDEBAR_PAGE_SIZE)
+    st.caption(f"{total} files · page {page + 1} of {pages}")
+    if not rows:
+        return
+    st.dataframe(rows, hide_index=True, use_container_width=True)
+
+    # Only the selected file is read and served.
+    selected = st.selectbox("File", [row["name"] for row in rows], key=f"{key}_selected")
+    if selected and not os.path.exists(os.path.join(folder, selected)):
+        st.warning(f"{selected} no longer exists. Press Refresh to update the list.")
+    elif selected:
+        with open(os.path.join(folder, selected), "rb") as f:
+            st.download_button(f"⬇ {selected}", data=f, file_name=selected, key=f"{key}_download")
+
+    if st.button("📦 Prepare zip of all files", key=f"{key}_zip_btn"):
+        st.session_state[f"{key}_zip"] = build_zip(folder, os.path.join(DOWNLOAD_CACHE_FOLDER, f"{key}.zip"))
+    zip_path = st.session_state.get(f"{key}_zip")
+    if zip_path and os.path.exists(zip_path):
+        with open(zip_path, "rb") as f:
+            st.download_button("⬇ Download zip", data=f, file_name=os.path.basename(zip_path),
+                               mime="application/zip", key=f"{key}_zip_download")
 
 # Helper function to trigger rerun
 def trigger_rerun(key):
@@ -427,20 +1227,6 @@ def st_sidebar():
             padding: 4px 6px !important;
         }
 
-        /* Compact custom download button */
-        .small-btn {
-            display: inline-block;
-            padding: 3px 8px;
-            margin: 2px 0;
-            background-color: none;
-            color: white;
-            text-decoration: none;
-            font-size: 0.75rem;
-            border-radius: 4px;
-        }
-        .small-btn:hover {
-            background-color: #f5f4ed;
-        }
         </style>
         """,
         unsafe_allow_html=True,
@@ -455,6 +1241,7 @@ def st_sidebar():
         if os.path.exists(OUTPUT_FOLDER):
             with st.expander("✅ Generated Documents", expanded=False): 
                 if st.button("🔄 Refresh", key="refresh_documents_btn"):
+                    artifact_store.sync_folder("documents", OUTPUT_FOLDER)
                     trigger_rerun("refresh_documents")
                 col1, col2 = st.columns([2, 1])
                 with col1:
@@ -467,17 +1254,17 @@ def st_sidebar():
                         for fname in os.listdir(OUTPUT_FOLDER):
                             fpath = os.path.join(OUTPUT_FOLDER, fname)
                             os.remove(fpath)
+                        artifact_store.forget_folder(OUTPUT_FOLDER)
                         st.success("✅ All generated files have been deleted.")
                     except Exception as e:
                         st.error(f"❌ Error deleting files: {e}")
 
-                for fname in os.listdir(OUTPUT_FOLDER):
-                    fpath = os.path.join(OUTPUT_FOLDER, fname) 
-                    small_download_button(fpath, fname)
+                st_file_browser(OUTPUT_FOLDER, "documents")
 
         if os.path.exists(GEN_SCRIPT_FOLDER):
             with st.expander("✅ Generated Selenium Scripts", expanded=False): 
                 if st.button("🔄 Refresh", key="refresh_scripts_btn"):
+                    artifact_store.sync_folder("scripts", GEN_SCRIPT_FOLDER)
                     trigger_rerun("refresh_scripts")
                 col1, col2 = st.columns([2, 1])
                 with col1:
@@ -489,61 +1276,98 @@ def st_sidebar():
                         for fname in os.listdir(GEN_SCRIPT_FOLDER):
                             fpath = os.path.join(GEN_SCRIPT_FOLDER, fname)
                             os.remove(fpath)
+                        artifact_store.forget_folder(GEN_SCRIPT_FOLDER)
                         st.success("✅ All generated scripts have been deleted.")
                     except Exception as e:
                         st.error(f"❌ Error deleting scripts: {e}")
 
-                for fname in os.listdir(GEN_SCRIPT_FOLDER):
-                    fpath = os.path.join(GEN_SCRIPT_FOLDER, fname) 
-                    small_download_button(fpath, fname)
+                st_file_browser(GEN_SCRIPT_FOLDER, "scripts")
 
 
 
 def st_start_processing(app) -> AgentState:
-
+    # The run is handed to a background job so the UI stays responsive and the job keeps
+    # running if the tab is closed; st_job_status polls its progress.
+    job_manager = jobs.get_job_manager()
+    incremental = st.checkbox("♻️ Incremental mode (reuse unchanged features, stories and test cases)",
+                              value=os.getenv("INCREMENTAL_MODE", "1") == "1")
+    previous_run_id = last_run_id()
+    resume = bool(previous_run_id) and st.checkbox(f"⏯️ Resume last run ({previous_run_id}) instead of starting over")
+    # Only jobs this session submitted (or reattached to by id) are shown, so one user's
+    # run, report and downloads never show up in another user's session.
+    job_ids = st.session_state.setdefault("job_ids", [])
     if st.button("🚀 Generate Test Scripts"):
-        st.info("⚡ Running pipeline... Logs will appear below.")
-        
-        # Create a log placeholder in UI
-        log_placeholder = st.empty()
-        streamlit_handler = StreamlitLogger(log_placeholder)
-        formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-        streamlit_handler.setFormatter(formatter)
-
-        # Attach handler to root logger
-        stlogger = logging.getLogger()
-        stlogger.setLevel(logging.INFO)
-        stlogger.addHandler(streamlit_handler)
-
-
-        with st.spinner("Processing..."):
-            try:
-                init_state: AgentState = {"requirement_docs": docs}
-                final_state = app.invoke(init_state)
-                st.success("🎉 Pipeline finished successfully!")
-                st.balloons()
-                return final_state
-            except Exception as e:
-                st.error(f"❌ Error: {str(e)}") 
+        job_ids.append(job_manager.submit(
+            run_pipeline, app, docs, run_id=previous_run_id if resume else None, resume=resume,
+            priority=rate_limiter.INTERACTIVE,
+            incremental=incremental, description="resume" if resume else "new run",
+        ))
+        st.query_params["job"] = job_ids[-1]
+
+    job = next((job for job in map(job_manager.get, reversed(job_ids)) if job is not None), None)
+    if job is None:
+        job = st_reattach_job(job_manager, job_ids)
+    if job is not None:
+        st_job_status(job.id)
+        if job.status == jobs.SUCCEEDED:
+            return job.result
+
+
+def st_reattach_job(job_manager, job_ids: List[str]):
+    # A reloaded tab is a new session but keeps its URL, which carries the id of the job it
+    # started; any other job is opened only by entering its id. Jobs are never listed.
+    job_id = st.query_params.get("job")
+    if not job_id:
+        with st.expander("⏯️ Reattach to an earlier job"):
+            job_id = st.text_input("Job id", help="The ?job=... value in the URL of the tab that started it").strip()
+    if not job_id:
+        return None
+    job = job_manager.get(job_id)
+    if job is None:
+        st.warning(f"No job {job_id} in this server process.")
+        return None
+    job_ids.append(job.id)
+    st.query_params["job"] = job.id
+    return job
+
+
+def st_job_status(job_id: str):
+    # Wrapped at call time so that importing main never imports streamlit.
+    st.fragment(run_every=UI_REFRESH_SECONDS)(_st_job_status)(job_id)
+
+
+def _st_job_status(job_id: str):
+    job = jobs.get_job_manager().get(job_id)
+    if job is None:
+        return
+    if job.status in (jobs.QUEUED, jobs.RUNNING):
+        st.info(f"⚡ Job {job.id} {job.status}" + (f" — {job.current_node}" if job.current_node else ""))
+    for stage, counts in job.progress().items():
+        total = max(counts["total"], 1)
+        st.progress(min(counts["done"] / total, 1.0), text=f"{stage}: {counts['done']}/{counts['total']}")
+    st.text("\n".join(job.log_tail(UI_LOG_LINES)))
+
+    if job.status == jobs.FAILED:
+        st.error(f"❌ Error: {job.error}")
+    elif job.status == jobs.SUCCEEDED:
+        final_state = job.result or {}
+        st.success(f"🎉 Pipeline finished successfully in {job.finished_at - job.started_at:.0f}s!")
+        if final_state.get("run_report"):
+            st.caption(f"📈 Run report: {final_state['run_report']}")
+        if final_state.get("reused"):
+            reused = final_state["reused"]
+            st.info(f"♻️ Skipped unchanged items: {reused.get('features', 0)} features, "
+                    f"{reused.get('user_stories', 0)} user stories, {reused.get('test_cases', 0)} test cases.")
 
 # -------------------------------
 # 6. Run Example 
 
 # -------------------------------
 if __name__ == "__main__":
-  
-    INPUT_REQ_DOCS_FOLDER = "requirement_docs"
-    GEN_SCRIPT_FOLDER = "GEN-TESTSCRIPTS"
-    OUTPUT_FOLDER = "generated_outputs"
-    GENAI_RAW_OUTPUT="GenAI_RAW_OUTPUT.md"
-    DOCUMENT_NAME="GenAI_Features_UserStories_Tescases.docx"
-    os.makedirs(GEN_SCRIPT_FOLDER, exist_ok=True)
-    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
-    os.makedirs(INPUT_REQ_DOCS_FOLDER, exist_ok=True)
+    configure_folders()
     st_initialize()
     docs=st_upload_file()
     app=createLangraphApp()
     final_state=st_start_processing(app)
     st_sidebar() 
     #logger.info("Agent Execution complete!")
-
@@ -0,0 +1,175 @@
+import contextvars
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("TestScriptGenerationAgent")
+
+# Stage (node) the current code runs under; copied into worker threads with the context.
+current_stage: contextvars.ContextVar[str] = contextvars.ContextVar("current_stage", default="unknown")
+_run_registry: contextvars.ContextVar[Optional["MetricsRegistry"]] = contextvars.ContextVar("run_registry", default=None)
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Histogram:
+    MAX_SAMPLES = 10000
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self._samples: List[float] = []
+        self._random = random.Random(0)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if len(self._samples) < self.MAX_SAMPLES:
+            self._samples.append(value)
+        else:
+            # Reservoir sampling: every value seen so far is kept with the same probability, so
+            # percentiles cover the whole run, not its end. Seeded, so reports are reproducible.
+            slot = self._random.randrange(self.count)
+            if slot < self.MAX_SAMPLES:
+                self._samples[slot] = value
+
+    def percentile(self, q: float) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": round(self.total, 4),
+            "p50": round(self.percentile(0.50), 4),
+            "p95": round(self.percentile(0.95), 4),
+            "p99": round(self.percentile(0.99), 4),
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[LabelKey, float] = {}
+        self.histograms: Dict[LabelKey, Histogram] = {}
+        self.started_at = time.time()
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> LabelKey:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, amount: float = 1, **labels: Any) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            self.histograms.setdefault(key, Histogram()).observe(value)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            histograms = [{"name": name, "labels": dict(labels), **histogram.summary()}
+                          for (name, labels), histogram in sorted(self.histograms.items())]
+        return {"started_at": self.started_at, "duration_seconds": round(time.time() - self.started_at, 3),
+                "counters": counters, "histograms": histograms}
+
+    def prometheus_text(self) -> str:
+        def fmt(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        lines = []
+        with self._lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                lines.append(f"{name}{fmt(labels)} {value}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                for q in (0.5, 0.95, 0.99):
+                    lines.append(f"{name}{fmt(labels, [('quantile', q)])} {histogram.percentile(q)}")
+                lines.append(f"{name}_sum{fmt(labels)} {histogram.total}")
+                lines.append(f"{name}_count{fmt(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry (what the Prometheus endpoint serves).
+REGISTRY = MetricsRegistry()
+
+
+def inc(name: str, amount: float = 1, **labels: Any) -> None:
+    REGISTRY.inc(name, amount, **labels)
+    run_registry = _run_registry.get()
+    if run_registry is not None:
+        run_registry.inc(name, amount, **labels)
+
+
+def observe(name: str, value: float, **labels: Any) -> None:
+    REGISTRY.observe(name, value, **labels)
+    run_registry = _run_registry.get()
+    if run_registry is not None:
+        run_registry.observe(name, value, **labels)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    token = current_stage.set(name)
+    try:
+        yield
+    finally:
+        current_stage.reset(token)
+
+
+@contextmanager
+def run_metrics() -> Iterator[MetricsRegistry]:
+    # Collects a separate copy of every metric recorded by this run (and its worker threads).
+    registry = MetricsRegistry()
+    token = _run_registry.set(registry)
+    try:
+        yield registry
+    finally:
+        _run_registry.reset(token)
+
+
+def write_run_report(registry: MetricsRegistry, path: str, **extra: Any) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({**extra, **registry.report()}, f, indent=2)
+    logger.info(f"Run report written to {path}")
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_prometheus_server(port: int, host: str = "127.0.0.1") -> None:
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Serving Prometheus metrics on http://{host}:{port}/metrics")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = REGISTRY.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
@@ -0,0 +1,209 @@
+import ast
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Set, Tuple
+
+logger = logging.getLogger("TestScriptGenerationAgent")
+
+PAGES_MODULE = "pages.py"
+CONFTEST_MODULE = "conftest.py"
+
+CONFTEST_TEMPLATE = '''import os
+
+import pytest
+from selenium import webdriver
+
+
+@pytest.fixture
+def driver():
+    options = webdriver.ChromeOptions()
+    if os.getenv("HEADLESS", "1") == "1":
+        options.add_argument("--headless=new")
+    driver = webdriver.Chrome(options=options)
+    yield driver
+    driver.quit()
+'''
+
+PAGES_TEMPLATE = '''import os
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+TIMEOUT = float(os.getenv("PAGE_TIMEOUT", "10"))
+
+
+class BasePage:
+    """Explicit waits and common actions; page classes add a path, locators and flows."""
+
+    path = "/"
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.wait = WebDriverWait(driver, TIMEOUT)
+
+    def open(self):
+        """Load the page and return it."""
+        self.driver.get(BASE_URL + self.path)
+        return self
+
+    def find(self, locator):
+        """Wait until the (By.X, value) locator is visible and return the element."""
+        return self.wait.until(EC.visibility_of_element_located(locator))
+
+    def click(self, locator):
+        """Wait until the element is clickable and click it."""
+        self.wait.until(EC.element_to_be_clickable(locator)).click()
+
+    def type(self, locator, text):
+        """Clear the field and type text into it."""
+        element = self.find(locator)
+        element.clear()
+        element.send_keys(text)
+
+    def text_of(self, locator):
+        """Visible text of the element."""
+        return self.find(locator).text
+
+    def is_visible(self, locator):
+        """True if the element becomes visible before the timeout."""
+        try:
+            self.find(locator)
+            return True
+        except Exception:
+            return False
+
+    def current_url(self):
+        return self.driver.current_url
+'''
+
+_FENCE = re.compile(r"^\s*```[a-zA-Z]*\s*$", re.MULTILINE)
+_lock = threading.Lock()
+
+
+def ensure_library(folder: str) -> None:
+    # Seeds the fixture and base page once; later runs keep the merged page classes.
+    for name, template in ((CONFTEST_MODULE, CONFTEST_TEMPLATE), (PAGES_MODULE, PAGES_TEMPLATE)):
+        path = os.path.join(folder, name)
+        if not os.path.exists(path):
+            _write(path, template)
+
+
+def _write(path: str, source: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(source)
+    os.replace(tmp_path, path)
+
+
+def _read(folder: str) -> str:
+    with open(os.path.join(folder, PAGES_MODULE), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _signature(node: ast.FunctionDef) -> str:
+    args = [arg.arg for arg in node.args.args]
+    if node.args.vararg:
+        args.append(f"*{node.args.vararg.arg}")
+    if node.args.kwarg:
+        args.append(f"**{node.args.kwarg.arg}")
+    doc = (ast.get_docstring(node) or "").strip().splitlines()
+    return f"{node.name}({', '.join(args)})" + (f"  # {doc[0]}" if doc else "")
+
+
+def library_interface(folder: str) -> str:
+    """Compact listing of the page classes (bases, class attributes, method signatures and
+    the first docstring line) that goes into the prompt instead of their source."""
+    tree = ast.parse(_read(folder))
+    lines = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        bases = ", ".join(ast.unparse(base) for base in node.bases)
+        lines.append(f"class {node.name}({bases}):" if bases else f"class {node.name}:")
+        for item in node.body:
+            if isinstance(item, ast.Assign) and all(isinstance(target, ast.Name) for target in item.targets):
+                lines.append(f"    {ast.unparse(item)}")
+            elif isinstance(item, ast.FunctionDef) and not item.name.startswith("_"):
+                lines.append(f"    def {_signature(item)}")
+    return "\n".join(lines)
+
+
+def strip_code_fences(source: str) -> str:
+    return _FENCE.sub("", source).strip() + "\n"
+
+
+def _node_lines(node: ast.AST) -> Tuple[int, int]:
+    start = min([node.lineno] + [decorator.lineno for decorator in getattr(node, "decorator_list", [])])
+    return start, node.end_lineno
+
+
+def _is_page_class(node: ast.AST) -> bool:
+    return isinstance(node, ast.ClassDef) and (
+        node.name.endswith("Page") or any(ast.unparse(base).endswith("Page") for base in node.bases))
+
+
+def merge_page_classes(folder: str, source: str) -> Tuple[str, List[str]]:
+    """Moves the page classes a generated test module defines into the shared pages module.
+
+    New classes are appended and new methods are added to existing classes; methods
+    that already exist are kept as they are. Returns the test module without the page
+    classes (importing the ones it uses from ``pages``) and the names merged.
+    """
+    tree = ast.parse(source)
+    page_nodes = [node for node in tree.body if _is_page_class(node)]
+    source_lines = source.splitlines()
+    merged: List[str] = []
+
+    with _lock:
+        pages_source = _read(folder)
+        pages_tree = ast.parse(pages_source)
+        existing: Dict[str, ast.ClassDef] = {node.name: node for node in pages_tree.body if isinstance(node, ast.ClassDef)}
+        pages_lines = pages_source.rstrip("\n").splitlines()
+        insertions: List[Tuple[int, List[str]]] = []
+        appended: List[str] = []
+        for node in page_nodes:
+            start, end = _node_lines(node)
+            if node.name not in existing:
+                appended += ["", ""] + source_lines[start - 1:end]
+                merged.append(node.name)
+                continue
+            known: Set[str] = {item.name for item in existing[node.name].body if isinstance(item, ast.FunctionDef)}
+            methods = [item for item in node.body if isinstance(item, ast.FunctionDef) and item.name not in known]
+            if methods:
+                block: List[str] = []
+                for method in methods:
+                    method_start, method_end = _node_lines(method)
+                    block += [""] + source_lines[method_start - 1:method_end]
+                insertions.append((existing[node.name].end_lineno, block))
+                merged.append(node.name)
+        for line_number, block in sorted(insertions, reverse=True):
+            pages_lines[line_number:line_number] = block
+        new_pages = "\n".join(pages_lines + appended) + "\n"
+        if merged:
+            try:
+                ast.parse(new_pages)
+                _write(os.path.join(folder, PAGES_MODULE), new_pages)
+            except SyntaxError as e:
+                logger.warning(f"Could not merge page classes {merged} into {PAGES_MODULE}. Skipping. {e}")
+                merged = []
+        page_names = {node.name for node in ast.parse(new_pages if merged else pages_source).body
+                      if isinstance(node, ast.ClassDef)}
+
+    # The test module keeps everything but the page classes and imports the pages it uses.
+    removed = set()
+    for node in page_nodes:
+        start, end = _node_lines(node)
+        removed.update(range(start - 1, end))
+    test_source = "\n".join(line for index, line in enumerate(source_lines) if index not in removed)
+    test_tree = ast.parse(test_source)
+    imported = {alias.asname or alias.name for node in ast.walk(test_tree)
+                if isinstance(node, ast.ImportFrom) and node.module == "pages" for alias in node.names}
+    used = {node.id for node in ast.walk(test_tree) if isinstance(node, ast.Name) and node.id in page_names}
+    missing = sorted(used - imported)
+    if missing:
+        test_source = f"from pages import {', '.join(missing)}\n" + test_source
+    return re.sub(r"\n{3,}", "\n\n\n", test_source).strip() + "\n", merged
@@ -0,0 +1,161 @@
+import logging
+import os
+from typing import List, Tuple
+
+from chunking import estimate_tokens
+
+logger = logging.getLogger("TestScriptGenerationAgent")
+
+
+def _read_context(path: str) -> str:
+    if not path:
+        return ""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError as e:
+        logger.warning(f"Could not read PROMPT_CONTEXT_FILE {path}. Skipping. {e}")
+        return ""
+
+
+# Optional project context (application under test, roles, URLs, conventions) that leads the
+# system message of every stage, so all calls share one prefix. Azure OpenAI only caches a
+# prefix of 1024+ tokens; the built-in instructions alone are about 30-130 tokens, so without
+# a context file of roughly 1000 tokens no call is served from the prompt cache.
+PROMPT_CONTEXT = _read_context(os.getenv("PROMPT_CONTEXT_FILE"))
+
+
+class Prompt:
+    """A rendered prompt: the template's static system message plus the variable user message.
+
+    Sent as two chat messages so every call of a stage starts with the same tokens,
+    which Azure OpenAI can serve from its prompt cache (prefixes of 1024+ tokens).
+    """
+
+    __slots__ = ("name", "system", "user", "text")
+
+    def __init__(self, name: str, system: str, user: str):
+        self.name = name
+        self.system = system
+        self.user = user
+        # Scheduler reservations count the whole text; output budgets only the user message.
+        self.text = f"{system}\n\n{user}"
+
+    def messages(self) -> List[Tuple[str, str]]:
+        return [("system", self.system), ("human", self.user)]
+
+    @property
+    def prefix_tokens(self) -> int:
+        return estimate_tokens(self.system)
+
+    def __str__(self) -> str:
+        return self.text
+
+
+class PromptTemplate:
+    """Static instructions and output schema first; item data only in ``user``.
+
+    ``user`` is a str.format template filled by ``render``. Anything that varies between
+    calls belongs there, ordered from least to most variable, so the shared prefix stays
+    as long as possible.
+    """
+
+    def __init__(self, name: str, system: str, user: str):
+        self.name = name
+        self.system = system.strip()
+        self.user = user.strip()
+
+    def render(self, **values) -> Prompt:
+        system = f"{PROMPT_CONTEXT}\n\n{self.system}" if PROMPT_CONTEXT else self.system
+        return Prompt(self.name, system, self.user.format(**values))
+
+
+_NO_FENCES = """
+Do not include ```json
+"""
+
+FEATURES = PromptTemplate("features", """
+Extract features from the following requirement documents. Reference Output JSON list:
+[{"id": "F-xxx", "title": "...", "description": "..."}]
+""" + _NO_FENCES, """
+Documents:
+{documents}
+""")
+
+USER_STORIES = PromptTemplate("user_stories", """
+Generate user stories for these features (each feature can have multiple user stories). Reference Output JSON list:
+[{"id": "F-xxx_US-xxx", "feature_id": "F-xxx", "story": "As a ..."}]
+""" + _NO_FENCES, """
+Features:
+{feature}
+""")
+
+USER_STORIES_BATCH = PromptTemplate("user_stories_batch", """
+Generate user stories for each of these features (each feature can have multiple user stories). Reference Output JSON object keyed by feature id:
+{"F-xxx": [{"id": "F-xxx_US-xxx", "feature_id": "F-xxx", "story": "As a ..."}]}
+
+Include a key for every feature id.
+""" + _NO_FENCES, """
+Features (one JSON object per line):
+{features}
+""")
+
+TEST_CASES = PromptTemplate("test_cases", """
+Generate test cases for these user stories (each user stories can have multiple test cases). Reference output JSON list:
+[{"id": "US-xxx_TC-xxx", "user_story_id": "US-xxx", "steps": ["step1", "step2"], "expected_result": "..."}]
+
+Generate all the test cases
+""" + _NO_FENCES, """
+User Stories:
+{user_story}
+""")
+
+TEST_CASES_BATCH = PromptTemplate("test_cases_batch", """
+Generate test cases for each of these user stories (each user story can have multiple test cases). Reference output JSON object keyed by user story id:
+{"US-xxx": [{"id": "US-xxx_TC-xxx", "user_story_id": "US-xxx", "steps": ["step1", "step2"], "expected_result": "..."}]}
+
+Generate all the test cases and include a key for every user story id.
+""" + _NO_FENCES, """
+User Stories (one JSON object per line):
+{user_stories}
+""")
+
+SELENIUM_SCRIPT = PromptTemplate("scripts", """
+Generate a Selenium Python script for this test case and provide full code.
+
+Mandatory:
+- Use best practices and standards
+- Remove comments, notes, summaries, headers, trailers and ```python
+""", """
+Test case:
+{test_case}
+
+Filename: {filename}
+""")
+
+PAGE_OBJECT_TEST = PromptTemplate("test_bodies", """
+Write a pytest test for this test case using the shared page objects below.
+
+Mandatory:
+- Output one Python module: import the page classes you use from `pages` and define the test function named below with a single `driver` argument
+- Do not create, wait for or quit the driver yourself; use the page methods and assert the expected result
+- If a page or method is missing, define it in the same output as class <Name>Page(BasePage) with only the new members
+- Remove comments, notes, summaries, headers, trailers and ```python
+""", """
+Shared page objects (module `pages`; the `driver` fixture in conftest.py creates and quits the browser):
+{library}
+
+Test function: {test_name}(driver)
+
+Test case:
+{test_case}
+""")
+
+SCRIPT_REVIEW = PromptTemplate("review", """
+Validate this Selenium script against best practices and standards. Output "Pass" or "Fail with issues".
+""", """
+A static check raised these concerns, confirm or dismiss them:
+{warnings}
+
+{script}
+""")
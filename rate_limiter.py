@@ -0,0 +1,157 @@
+import contextvars
+import heapq
+import itertools
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+INTERACTIVE = 0
+BATCH = 1
+
+# Priority of the LLM calls made by the current run; copied into worker threads with the context.
+current_priority: contextvars.ContextVar[int] = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {"RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError", "Timeout"}
+_RETRY_AFTER_TEXT = re.compile(r"retry after (\d+(?:\.\d+)?) (milli)?seconds?", re.IGNORECASE)
+
+
+class TokenBucket:
+    # Refills continuously at per_minute / 60 per second and holds at most burst_seconds
+    # worth. A request larger than the bucket may go ahead once it is full.
+    def __init__(self, per_minute: float, burst_seconds: float = 10.0):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, per_minute * burst_seconds / 60.0)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        needed = min(amount, self.capacity)
+        return 0.0 if self.level >= needed else (needed - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+
+class RateLimitScheduler:
+    """Process-wide requests/min and tokens/min limiter for one Azure OpenAI deployment.
+
+    Callers wait in a priority queue (interactive before batch, then first come first
+    served), so a long batch run cannot starve a user waiting in the UI. ``pause``
+    holds every caller back after a 429, honouring the server's Retry-After.
+    A limit of 0 disables that bucket.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self._buckets: List[Tuple[TokenBucket, bool]] = []
+        if requests_per_minute > 0:
+            self._buckets.append((TokenBucket(requests_per_minute), False))
+        if tokens_per_minute > 0:
+            self._buckets.append((TokenBucket(tokens_per_minute), True))
+        self._condition = threading.Condition()
+        self._waiting: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+
+    def acquire(self, tokens: int, priority: int = INTERACTIVE) -> float:
+        # Blocks until this request may be sent; returns the seconds spent waiting.
+        start = time.monotonic()
+        ticket = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    if self._waiting[0] != ticket:
+                        self._condition.wait()
+                        continue
+                    now = time.monotonic()
+                    delay = self._paused_until - now
+                    for bucket, counts_tokens in self._buckets:
+                        bucket.refill(now)
+                        delay = max(delay, bucket.wait_time(tokens if counts_tokens else 1))
+                    if delay <= 0:
+                        for bucket, counts_tokens in self._buckets:
+                            bucket.take(tokens if counts_tokens else 1)
+                        break
+                    self._condition.wait(delay)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
+        return time.monotonic() - start
+
+    def pause(self, seconds: float) -> None:
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._condition.notify_all()
+
+
+_scheduler: Optional[RateLimitScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler(requests_per_minute: float = 0, tokens_per_minute: float = 0) -> RateLimitScheduler:
+    # One scheduler per process; this module is imported (not re-run) by Streamlit, so it
+    # survives reruns and is shared by every session. The first caller's limits apply.
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RateLimitScheduler(requests_per_minute, tokens_per_minute)
+        return _scheduler
+
+
+# -------------------------------
+# Retry classification for Azure OpenAI / httpx errors
+# -------------------------------
+def status_code(error: Exception) -> Optional[int]:
+    code = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return status_code(error) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def is_retryable(error: Exception) -> bool:
+    return status_code(error) in RETRYABLE_STATUS or type(error).__name__ in RETRYABLE_ERRORS
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return float(headers[name]) * scale
+        except (KeyError, TypeError, ValueError):
+            continue
+    match = _RETRY_AFTER_TEXT.search(str(error))
+    if match:
+        return float(match.group(1)) * (0.001 if match.group(2) else 1.0)
+    return None
+
+
+def retry_delay(error: Exception, attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    # The server's Retry-After when given, otherwise exponential backoff with full jitter.
+    retry_after = retry_after_seconds(error)
+    if retry_after is not None:
+        return min(cap, retry_after)
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+@contextmanager
+def priority(level: Optional[int]) -> Iterator[None]:
+    # Runs the block (and the worker threads it starts) at the given priority; None keeps the current one.
+    if level is None:
+        yield
+        return
+    token = current_priority.set(level)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
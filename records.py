@@ -0,0 +1,133 @@
+import json
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Type, TypeVar
+
+R = TypeVar("R", bound="Record")
+
+
+class Record:
+    """Shared behaviour of the generated items kept in the agent state.
+
+    Fields the model returned that the record does not declare are kept in ``extra``,
+    and fields it left out stay ``None``, so ``to_dict`` gives back the original object
+    and fingerprints of manifests written by earlier runs still match.
+    """
+
+    __slots__ = ()
+    parent_key: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls: Type[R], data: Any) -> R:
+        if isinstance(data, cls):
+            return data
+        if not isinstance(data, dict):
+            raise ValueError(f"Expected a JSON object for {cls.__name__}, got {type(data).__name__}")
+        names = {f.name for f in fields(cls)} - {"extra"}
+        values = {name: data[name] for name in names if name in data}
+        if values.get("id") is not None:
+            values["id"] = str(values["id"])
+        return cls(**values, extra={key: value for key, value in data.items() if key not in names})
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {f.name: getattr(self, f.name) for f in fields(self) if f.name != "extra"}
+        data = {key: value for key, value in data.items() if value is not None}
+        data.update(self.extra)
+        return data
+
+    def to_prompt(self) -> str:
+        # Compact JSON: no indentation or spaces after separators, non-ASCII kept as is.
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
+    @property
+    def parent_id(self) -> Optional[str]:
+        # Falls back to the id prefix (F-001_US-002 -> F-001) when the parent key is missing.
+        if self.parent_key is None:
+            return None
+        return str(getattr(self, self.parent_key) or str(self.id or "").rsplit("_", 1)[0])
+
+
+@dataclass(slots=True)
+class Feature(Record):
+    id: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class UserStory(Record):
+    parent_key = "feature_id"
+
+    id: Optional[str] = None
+    feature_id: Optional[str] = None
+    story: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class TestCase(Record):
+    parent_key = "user_story_id"
+
+    id: Optional[str] = None
+    user_story_id: Optional[str] = None
+    steps: Optional[List[Any]] = None
+    expected_result: Optional[Any] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+# (module, class) pairs the checkpoint serializer may rebuild from the saved agent state.
+CHECKPOINT_TYPES = [(cls.__module__, cls.__name__) for cls in (Feature, UserStory, TestCase)]
+
+
+def coerce(cls: Type[R], items: Any) -> List[R]:
+    # Accepts records, plain dicts (journal, manifest, LLM output) or the JSON string
+    # older checkpoints stored features as.
+    if isinstance(items, str):
+        items = json.loads(items)
+    return [cls.from_dict(item) for item in items or []]
+
+
+def plain(value: Any) -> Any:
+    # JSON-ready form of records and lists of records; anything else is returned unchanged.
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, (list, tuple)):
+        return [plain(item) for item in value]
+    return value
+
+
+class RecordIndex:
+    """id -> record and parent id -> children over the items of one stage, in input order."""
+
+    def __init__(self, items: Iterable[Record] = ()):
+        self.by_id: Dict[str, Record] = {}
+        self.children: Dict[str, List[Record]] = {}
+        self._order: List[Record] = []
+        for item in items:
+            self.add(item)
+
+    def add(self, item: Record) -> None:
+        self._order.append(item)
+        if item.id is not None:
+            self.by_id.setdefault(item.id, item)
+        if item.parent_id is not None:
+            self.children.setdefault(item.parent_id, []).append(item)
+
+    def get(self, item_id: str) -> Optional[Record]:
+        return self.by_id.get(item_id)
+
+    def children_of(self, parent_id: str) -> List[Record]:
+        return self.children.get(parent_id, [])
+
+    def __iter__(self) -> Iterator[Record]:
+        return iter(self._order)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+
+def summarize(items: List[Any], limit: int = 5) -> str:
+    # Bounded log line: the count and the first few ids, never the items themselves.
+    ids = [str(getattr(item, "id", None) or (item.get("id") if isinstance(item, dict) else "?")) for item in items[:limit]]
+    more = f", ... (+{len(items) - limit} more)" if len(items) > limit else ""
+    return f"{len(items)} [{', '.join(ids)}{more}]"
@@ -0,0 +1,123 @@
+import json
+import os
+from typing import Any, Dict, Iterator, List, Tuple
+
+from records import Feature, RecordIndex, TestCase, UserStory, coerce
+
+REPORT_TITLE = "Requirement Analysis Report"
+TEST_CASE_COLUMNS = ("ID", "Steps", "Expected result", "Script", "Validation")
+
+
+def iter_sections(state: Dict[str, Any]) -> Iterator[Tuple[Feature, List[Tuple[UserStory, List[TestCase]]]]]:
+    """Yields (feature, [(user_story, [test_case, ...]), ...]) in generation order.
+
+    Stories and test cases whose parent id matches nothing are yielded last under an
+    "Unassigned" section, so every generated item appears in the report.
+    """
+    features = coerce(Feature, state.get("features"))
+    stories = RecordIndex(coerce(UserStory, state.get("user_stories")))
+    test_cases = RecordIndex(coerce(TestCase, state.get("test_cases")))
+    claimed = set()
+
+    def with_test_cases(story: UserStory) -> Tuple[UserStory, List[TestCase]]:
+        # A story id repeated by the model gets its test cases only once.
+        if story.id in claimed:
+            return story, []
+        claimed.add(story.id)
+        return story, test_cases.children_of(story.id)
+
+    feature_ids = {feature.id for feature in features}
+    for feature in features:
+        yield feature, [with_test_cases(story) for story in stories.children_of(feature.id)]
+
+    orphans = [with_test_cases(story) for story in stories if story.parent_id not in feature_ids]
+    orphans += [(UserStory(id=story_id), children) for story_id, children in test_cases.children.items()
+                if story_id not in claimed]
+    if orphans:
+        yield Feature(title="Unassigned"), orphans
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return "\n".join(f"{number}. {_text(step)}" for number, step in enumerate(value, 1))
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    return "" if value is None else str(value)
+
+
+def _add_hyperlink(paragraph, target: str, text: str) -> None:
+    from docx.opc.constants import RELATIONSHIP_TYPE
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+
+    relationship_id = paragraph.part.relate_to(target, RELATIONSHIP_TYPE.HYPERLINK, is_external=True)
+    hyperlink = OxmlElement("w:hyperlink")
+    hyperlink.set(qn("r:id"), relationship_id)
+    run = OxmlElement("w:r")
+    properties = OxmlElement("w:rPr")
+    style = OxmlElement("w:rStyle")
+    style.set(qn("w:val"), "Hyperlink")
+    properties.append(style)
+    run.append(properties)
+    label = OxmlElement("w:t")
+    label.text = text
+    run.append(label)
+    hyperlink.append(run)
+    paragraph._p.append(hyperlink)
+
+
+def render_report(state: Dict[str, Any], output_path: str) -> Dict[str, int]:
+    """Builds the Features -> User Stories -> Test Cases report straight from the agent state.
+
+    No LLM is involved, so the same state always renders the same document. Sections
+    are appended feature by feature; script cells link to the generated file relative
+    to the report. Returns the number of features, stories and test cases rendered.
+    """
+    from docx import Document as DocxDocument
+
+    scripts: Dict[str, str] = state.get("selenium_scripts") or {}
+    validation: Dict[str, str] = state.get("validation_results") or {}
+    duplicates: Dict[str, str] = state.get("duplicates") or {}
+    report_folder = os.path.dirname(os.path.abspath(output_path))
+    counts = {"features": 0, "user_stories": 0, "test_cases": 0}
+
+    doc = DocxDocument()
+    doc.add_heading(REPORT_TITLE, 0)
+    summary = doc.add_paragraph()  # filled in once the counts are known
+
+    for feature, stories in iter_sections(state):
+        counts["features"] += 1 if feature.id is not None else 0
+        doc.add_heading(f"{feature.id or ''} {feature.title or ''}".strip(), 1)
+        if feature.description:
+            doc.add_paragraph(_text(feature.description))
+        for story, test_cases in stories:
+            counts["user_stories"] += 1
+            doc.add_heading(story.id or "", 2)
+            doc.add_paragraph(_text(story.story or story.extra.get("description")))
+            if not test_cases:
+                continue
+            table = doc.add_table(rows=1, cols=len(TEST_CASE_COLUMNS))
+            table.style = "Table Grid"
+            for cell, column in zip(table.rows[0].cells, TEST_CASE_COLUMNS):
+                cell.text = column
+            for tc in test_cases:
+                counts["test_cases"] += 1
+                tc_id = tc.id or ""
+                cells = table.add_row().cells
+                cells[0].text = tc_id
+                cells[1].text = _text(tc.steps)
+                cells[2].text = _text(tc.expected_result)
+                script = scripts.get(tc_id)
+                if script:
+                    target = os.path.relpath(os.path.abspath(script), report_folder).replace(os.sep, "/")
+                    _add_hyperlink(cells[3].paragraphs[0], target, os.path.basename(script))
+                    if tc_id in duplicates:
+                        cells[3].add_paragraph(f"Shared with {duplicates[tc_id]}")
+                cells[4].text = _text(validation.get(tc_id))
+
+    summary.add_run(
+        f"{counts['features']} features, {counts['user_stories']} user stories, {counts['test_cases']} test cases, "
+        f"{len(set(scripts.values()))} Selenium scripts."
+    )
+    doc.save(output_path)
+    return counts
@@ -0,0 +1,77 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from incremental import fingerprint
+
+
+class RunJournal:
+    """Per-item results of a run, written as soon as each item completes.
+
+    LangGraph's checkpointer only saves state at node boundaries; the journal lets a
+    resumed run skip every feature, story and test case that finished before the
+    interruption, even when it happened half way through a node.
+    """
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS run_items (
+                run_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                item_key TEXT NOT NULL,
+                output TEXT NOT NULL,
+                completed_at REAL NOT NULL,
+                PRIMARY KEY (run_id, stage, item_key)
+            )
+            """
+        )
+
+    def get(self, run_id: str, stage: str, item_key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output FROM run_items WHERE run_id = ? AND stage = ? AND item_key = ?",
+                (run_id, stage, item_key),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, run_id: str, stage: str, item_key: str, output: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO run_items (run_id, stage, item_key, output, completed_at) VALUES (?, ?, ?, ?, ?)",
+                (run_id, stage, item_key, json.dumps(output), time.time()),
+            )
+
+    def counts(self, run_id: str) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, COUNT(*) FROM run_items WHERE run_id = ? GROUP BY stage", (run_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def stage(self, run_id: str, stage: str) -> "JournalStage":
+        return JournalStage(self, run_id, stage)
+
+
+class JournalStage:
+    def __init__(self, journal: RunJournal, run_id: str, stage: str):
+        self.journal = journal
+        self.run_id = run_id
+        self.stage = stage
+
+    def lookup(self, item: Any, is_valid: Optional[Callable[[Any], bool]] = None) -> Optional[Any]:
+        output = self.journal.get(self.run_id, self.stage, fingerprint(item))
+        if output is not None and is_valid is not None and not is_valid(output):
+            return None
+        return output
+
+    def record(self, item: Any, output: Any) -> None:
+        self.journal.put(self.run_id, self.stage, fingerprint(item), output)
@@ -0,0 +1,136 @@
+import ast
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+PASS = "pass"
+FAIL = "fail"
+AMBIGUOUS = "ambiguous"
+
+VALIDATION_WORKERS = int(os.getenv("VALIDATION_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Below this many scripts the process pool start-up costs more than it saves.
+PARALLEL_THRESHOLD = 64
+
+LOCATOR_STRATEGIES = {"ID", "NAME", "CSS_SELECTOR", "XPATH", "LINK_TEXT", "PARTIAL_LINK_TEXT", "CLASS_NAME", "TAG_NAME"}
+ASSERT_METHOD_PREFIXES = ("assert", "fail")
+
+
+def _call_name(node: ast.Call) -> str:
+    func = node.func
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    if isinstance(func, ast.Name):
+        return func.id
+    return ""
+
+
+def _dotted(node: ast.AST) -> str:
+    if isinstance(node, ast.Attribute):
+        return f"{_dotted(node.value)}.{node.attr}"
+    if isinstance(node, ast.Name):
+        return node.id
+    return ""
+
+
+def validate_source(source: str) -> Dict[str, Any]:
+    """Checks a generated Selenium script against the house rules without running it.
+
+    Returns ``{"status": pass|fail|ambiguous, "issues": [...], "warnings": [...]}``.
+    Hard rule violations fail the script; softer smells only mark it ambiguous so
+    that the LLM reviewer can make the call.
+    """
+    issues: List[str] = []
+    warnings: List[str] = []
+    try:
+        tree = ast.parse(source)
+    except SyntaxError as e:
+        return {"status": FAIL, "issues": [f"Does not parse: {e.msg} (line {e.lineno})"], "warnings": []}
+
+    imports_selenium = uses_page_objects = False
+    sleep_names = set()
+    uses_wait = has_quit = has_assert = False
+    locators = 0
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module:
+            if node.module.startswith("selenium"):
+                imports_selenium = True
+            if node.module == "pages":
+                uses_page_objects = True
+            if node.module == "time" and any(alias.name == "sleep" for alias in node.names):
+                sleep_names.update(alias.asname or alias.name for alias in node.names if alias.name == "sleep")
+            if any(alias.name == "WebDriverWait" for alias in node.names):
+                uses_wait = True
+        elif isinstance(node, ast.Import):
+            if any(alias.name.startswith("selenium") for alias in node.names):
+                imports_selenium = True
+        elif isinstance(node, ast.Assert):
+            has_assert = True
+        elif isinstance(node, ast.FunctionDef) and node.name.startswith("test") \
+                and any(arg.arg == "driver" for arg in node.args.args):
+            uses_page_objects = True
+        elif isinstance(node, ast.Call):
+            name = _call_name(node)
+            dotted = _dotted(node.func)
+            if dotted == "time.sleep" or (isinstance(node.func, ast.Name) and node.func.id in sleep_names):
+                issues.append(f"Uses time.sleep instead of an explicit wait (line {node.lineno})")
+            elif name == "WebDriverWait":
+                uses_wait = True
+            elif name == "quit":
+                has_quit = True
+            elif name == "implicitly_wait":
+                warnings.append(f"Relies on implicit waits (line {node.lineno})")
+            elif name.startswith("find_element_by_") or name.startswith("find_elements_by_"):
+                issues.append(f"Uses removed locator API {name} (line {node.lineno})")
+            elif name.startswith(ASSERT_METHOD_PREFIXES):
+                has_assert = True
+            elif name in ("find_element", "find_elements") and node.args:
+                locators += 1
+                strategy = node.args[0]
+                if isinstance(strategy, ast.Attribute) and _dotted(strategy.value) == "By":
+                    if strategy.attr not in LOCATOR_STRATEGIES:
+                        issues.append(f"Unknown locator strategy By.{strategy.attr} (line {node.lineno})")
+                    elif strategy.attr == "XPATH" and len(node.args) > 1 and isinstance(node.args[1], ast.Constant) \
+                            and str(node.args[1].value).startswith("/html"):
+                        warnings.append(f"Brittle absolute XPath locator (line {node.lineno})")
+                elif isinstance(strategy, ast.Constant):
+                    warnings.append(f"Locator strategy given as a string literal (line {node.lineno})")
+
+    # Page-object tests get the driver from the conftest fixture, which quits it, and
+    # leave selenium imports and waits to the shared pages module.
+    if not imports_selenium and not uses_page_objects:
+        warnings.append("Does not import selenium")
+    if not uses_wait and locators:
+        issues.append("Locates elements without an explicit WebDriverWait")
+    if not has_quit and not uses_page_objects:
+        issues.append("Never tears down the driver with quit()")
+    if not has_assert:
+        issues.append("Has no assertions")
+
+    status = FAIL if issues else AMBIGUOUS if warnings else PASS
+    return {"status": status, "issues": issues, "warnings": warnings}
+
+
+def validate_file(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            source = f.read()
+    except OSError as e:
+        return {"status": FAIL, "issues": [f"Could not read script: {e}"], "warnings": []}
+    return validate_source(source)
+
+
+def validate_files(paths: List[str], max_workers: int = None) -> List[Dict[str, Any]]:
+    max_workers = max_workers or VALIDATION_WORKERS
+    if max_workers <= 1 or len(paths) < PARALLEL_THRESHOLD:
+        return [validate_file(path) for path in paths]
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        return list(executor.map(validate_file, paths, chunksize=max(1, len(paths) // (max_workers * 4))))
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    if result["status"] == PASS:
+        return "Pass"
+    return "Fail with issues: " + "; ".join(result["issues"] + result["warnings"])
@@ -0,0 +1,37 @@
+import records
+from dedup import cluster_items, item_text, jaccard, shingles
+
+STEPS = [
+    "Open the registration page",
+    "Enter a valid email address in the email field",
+    "Enter a valid first name and last name in the name fields",
+    "Accept the terms and conditions by ticking the checkbox",
+    "Enter a password of {length} characters in the password field",
+    "Enter the same password in the confirm password field",
+    "Click the 'Create account' button",
+]
+
+
+def password_case(tc_id: str, length: int) -> records.TestCase:
+    return records.TestCase(id=tc_id, user_story_id="F-001_US-001", steps=[step.format(length=length) for step in STEPS],
+                            expected_result="The form shows the error 'Password must be 8 to 128 characters'")
+
+
+def test_boundary_values_are_not_merged():
+    short, long = password_case("F-001_US-001_TC-001", 7), password_case("F-001_US-001_TC-002", 129)
+    # Similar enough to merge on wording alone.
+    assert jaccard(shingles(item_text(short)), shingles(item_text(long))) >= 0.9
+
+    representatives, duplicates = cluster_items([short, long], threshold=0.9)
+
+    assert [item.id for item in representatives] == [short.id, long.id]
+    assert duplicates == {}
+
+
+def test_identical_cases_with_other_ids_are_merged():
+    first, second = password_case("F-001_US-001_TC-001", 7), password_case("F-002_US-001_TC-004", 7)
+
+    representatives, duplicates = cluster_items([first, second], threshold=0.9)
+
+    assert [item.id for item in representatives] == [first.id]
+    assert duplicates == {second.id: first.id}
@@ -0,0 +1,12 @@
+import records
+
+
+def test_null_id_stays_none():
+    feature = records.Feature.from_dict({"id": None, "title": "Password reset"})
+
+    assert feature.id is None
+    assert feature.to_dict() == {"title": "Password reset"}
+
+
+def test_ids_are_strings():
+    assert records.Feature.from_dict({"id": 7}).id == "7"
@@ -4,6 +4,8 @@ import shutil
 import subprocess
 import sys
 
+from artifact_store import ArtifactStore
+
 
 # Ensure requirements folder exists
 REQUIREMENTS_FOLDER = "requirements"
@@ -50,25 +52,24 @@ if uploaded_files:
 # Show generated outputs
 st.subheader("📂 Generated Files")
 
-if os.path.exists("GEN-TESTSCRIPTS"):
-    st.markdown("### Selenium Test Scripts")
-    for fname in os.listdir("GEN-TESTSCRIPTS"):
-        fpath = os.path.join("GEN-TESTSCRIPTS", fname)
-        with open(fpath, "r", encoding="utf-8") as f:
-            st.download_button(
-                label=f"⬇️ Download {fname}",
-                data=f.read(),
-                file_name=fname,
-                mime="text/x-python"
-            )
+# Listed from the artifact store the pipeline writes; only the selected file is read.
+artifact_store = ArtifactStore(os.getenv("ARTIFACT_DB", os.path.join(".cache", "artifacts.sqlite")))
 
-if os.path.exists("outputs"):
-    st.markdown("### Collated Reports")
-    for fname in os.listdir("outputs"):
-        fpath = os.path.join("outputs", fname)
-        with open(fpath, "rb") as f:
+for title, category, folder in (("Selenium Test Scripts", "scripts", "GEN-TESTSCRIPTS"),
+                                ("Collated Reports", "documents", "outputs")):
+    if not os.path.exists(folder):
+        continue
+    st.markdown(f"### {title}")
+    files, total = artifact_store.list_files(folder, limit=-1)
+    if not total:
+        artifact_store.sync_folder(category, folder)
+        files, total = artifact_store.list_files(folder, limit=-1)
+    fname = st.selectbox("File", [row["name"] for row in files], key=f"{category}_file")
+    if fname and os.path.exists(os.path.join(folder, fname)):
+        with open(os.path.join(folder, fname), "rb") as f:
             st.download_button(
                 label=f"⬇️ Download {fname}",
                 data=f,
-                file_name=fname
+                file_name=fname,
+                key=f"{category}_download"
             )